@@ -0,0 +1,106 @@
+import os
+import re
+import sys
+import json
+
+main_path = "main.cpp"
+cache_path = "algorithms.json"
+
+aliases = {
+    "diffdomainbridge_10_3" : "DomainBridge",
+    "diffdomainbridge_10_1" : "DomainBridge_1",
+    "localdomainbridge_10_3" : "LocalDM",
+    "localdomainbridge_10_1" : "LocalDM_1",
+    "diffdomainbridge_8_3" : "DomainBridge",
+    "discoroute" : "DisCoRoute",
+    "dijkstrapred" : "DT-DVTR",
+    "minhopcount" : "FSA-LA",
+    "lbp" : "LBP",
+    "oracle" : "Oracle"
+}
+
+registry = None
+registry_source = None
+
+def normalize(name):
+    return name.replace("Base", "").lower()
+
+def makeEntry(id, node_type, family, params):
+    name = "_".join([family] + [str(param) for param in params])
+    key = normalize(name)
+    return {
+        "id": id,
+        "node_type": node_type,
+        "family": family,
+        "params": params,
+        "name": name,
+        "key": key,
+        "alias": aliases.get(key, name)
+    }
+
+def parseMain(file_path):
+    entries = [makeEntry(0, "", "Oracle", [])]
+    with open(file_path) as f:
+        for line in f.readlines():
+            if line.find("#define") != -1:
+                continue
+            searchObj = re.search(r'CASE\((\d+),\s*(\w+)\s*(?:<(.*)>)?\s*\)', line)
+            if searchObj:
+                id = int(searchObj.group(1))
+                node_type = searchObj.group(2)
+                params = []
+                if searchObj.group(3):
+                    params = [int(param) for param in searchObj.group(3).split("COMMA")]
+                family = node_type.replace("Node", "")
+                entries.append(makeEntry(id, node_type, family, params))
+    return entries
+
+def sourceStamp(file_path):
+    stat = os.stat(file_path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+def loadRegistry(file_path=main_path):
+    global registry, registry_source
+    stamp = [os.path.abspath(file_path)] + sourceStamp(file_path)
+    if registry is not None and registry_source == stamp:
+        return registry
+
+    cache_file = os.path.join(os.path.dirname(file_path), cache_path)
+    if os.path.exists(cache_file):
+        with open(cache_file) as f:
+            cache = json.load(f)
+        if cache["source"] == stamp:
+            registry, registry_source = cache["algorithms"], stamp
+            return registry
+
+    registry, registry_source = parseMain(file_path), stamp
+    tmp_file = cache_file + ".tmp"
+    with open(tmp_file, "w") as f:
+        json.dump({"source": stamp, "algorithms": registry}, f, indent=1)
+    os.replace(tmp_file, cache_file)
+    return registry
+
+def lookup(name, file_path=main_path):
+    key = normalize(name)
+    for entry in loadRegistry(file_path):
+        if entry["key"] == key:
+            return entry
+    return None
+
+def byId(id, file_path=main_path):
+    for entry in loadRegistry(file_path):
+        if entry["id"] == id:
+            return entry
+    return None
+
+def family(family_name, file_path=main_path):
+    return [entry for entry in loadRegistry(file_path) if entry["family"] == family_name]
+
+def alias(name, file_path=main_path):
+    entry = lookup(name, file_path)
+    return entry["alias"] if entry is not None else name
+
+if __name__ == "__main__":
+    file_path = sys.argv[1] if len(sys.argv) > 1 else main_path
+    for entry in loadRegistry(file_path):
+        print("{:>5} {:<28} {:<20} {}".format(entry["id"], entry["name"], entry["alias"], entry["params"]))
@@ -1,7 +1,7 @@
-import summary
+import algorithms
+import sweep
 import json
 import os
-algorithmDict = summary.getAlgoritmIdDict("main.cpp")
 
 simulationConfig = {
     "name": "GW-A59-3 Visualization",
@@ -34,19 +34,12 @@ serverDir = "visualization/backend"
 serverConfig = {}
 serverConfig["file_list"] = []
 
-def genFrameData(src, dst, algo, filename):
-    simulationConfig["visualization"] = {
-        "source": src,
-        "destination": dst,
-        "frames_dir": frameDir,
-        "file_name": filename
-    }
-    json.dump(simulationConfig, open("configs/visualization.json", "w"))
+frameJobs = []
 
-    algoId = algorithmDict[algo.lower()]
+def genFrameData(src, dst, algo, filename):
+    algoId = algorithms.lookup(algo)["id"]
     serverConfig["file_list"].append(filename)
-    if not os.path.exists(os.path.join(frameDir, filename)):
-        os.system("./main configs/visualization.json {}".format(algoId))
+    frameJobs.append(sweep.frameJob(simulationConfig, src, dst, algoId, frameDir, filename))
 
 def registerScenario(sname):
     fname = sname + " - .txt"
@@ -83,4 +76,6 @@ for scenario in [[825, 895], [895, -1]]:
     serverConfig["config"][sname] = algoList
 '''
 
+sweep.runJobs(frameJobs)
+
 json.dump(serverConfig, open(os.path.join(serverDir, "config.json"), "w"))
\ No newline at end of file
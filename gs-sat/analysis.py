@@ -1,50 +1,77 @@
 import common
 import sys
 import json
-import math
 import numpy as np
 import matplotlib.pyplot as plt
 
-if len(sys.argv) < 2:
-    print("Error: please specify configuration file!")
-    exit(0)
-
-json_f = open(sys.argv[1])
-config = json.loads(json_f.read())
-begin, end, step = config["begin"], config["end"], config["step"]
-gs_num = config["gs_num"]
-sat_num = config["sat_num"]
-
-res = []
-for curtime in range(begin + step, end, step):
-    cur_gs_sat_vis = common.loadData(config, curtime)
-    last_gs_sat_vis = common.loadData(config, curtime - step)
-    
-    for gs_id in range(gs_num):    
-        for last_elem in last_gs_sat_vis:
-            for cur_elem in cur_gs_sat_vis:
-                if last_elem[1] == cur_elem[1]:
-                    last_yaw = last_elem[3]
-                    cur_yaw = cur_elem[3]
-                    yaw_change = cur_yaw - last_yaw
-                    req_yaw_speed = min(math.fabs(yaw_change - 360), math.fabs(yaw_change), math.fabs(yaw_change + 360)) / step
-                    res.append(req_yaw_speed)
-                    break
+max_vel = 20
+percentiles = [50, 90, 99, 100]
 
+def slew_speeds(config):
+    step = config["step"]
+    sat_num = config["sat_num"]
+    data, offsets = common.loadSeries(config)
+    t_idx = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    gs_id = data[:, 0].astype(np.int64)
+    sat_id = data[:, 1].astype(np.int64)
 
-max_vel = 20
-hist, bin_edges = np.histogram(res, bins = range(0, max_vel, 1))
-print(hist, bin_edges)
-y = [0] + [freq / len(res) for freq in hist]
-x = range(0, max_vel, 1)
-plt.xticks(range(0, max_vel + 2, 2))
-plt.xlim((0, max_vel))
-plt.ylim((0, 1))
-plt.plot(x, y, 'b-', lw=1.2, alpha=0.6)
-plt.axvline(x=3, color='r', linestyle='--', linewidth=0.8)
-plt.xlabel("angular velocity (degrees per second)")
-plt.title("the distribution of angular velocity of satellites")
-plt.savefig("plot_figs/angular_velocity_dist.png")
-plt.close()
-
-print(max(res))
\ No newline at end of file
+    order = np.lexsort((t_idx, gs_id * sat_num + sat_id))
+    key = (gs_id * sat_num + sat_id)[order]
+    t_idx = t_idx[order]
+    data = data[order]
+    joined = (key[1:] == key[:-1]) & (t_idx[1:] == t_idx[:-1] + 1)
+
+    last, cur = data[:-1][joined], data[1:][joined]
+    yaw_change = np.abs((cur[:, 3] - last[:, 3] + 180) % 360 - 180)
+    pitch_change = np.abs(cur[:, 2] - last[:, 2])
+    return cur[:, 0].astype(np.int64), yaw_change / step, pitch_change / step
+
+def station_table(task, gs_num, gs_id, speeds):
+    rows = []
+    for axis, speed in speeds.items():
+        for station in ["all"] + list(range(gs_num)):
+            cur = speed if station == "all" else speed[gs_id == station]
+            if len(cur) == 0:
+                continue
+            hist, _ = np.histogram(cur, bins=range(0, max_vel + 1, 1))
+            pct = np.percentile(cur, percentiles)
+            rows.append([task, station, axis, len(cur)] + pct.tolist() + (hist / len(cur)).tolist())
+    return rows
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Error: please specify configuration file!")
+        exit(0)
+
+    table = []
+    for config_path in sys.argv[1:]:
+        json_f = open(config_path)
+        config = json.loads(json_f.read())
+        json_f.close()
+
+        gs_id, yaw_speed, pitch_speed = slew_speeds(config)
+        table += station_table(config["task"], config["gs_num"], gs_id, {"yaw": yaw_speed, "pitch": pitch_speed})
+
+        hist, bin_edges = np.histogram(yaw_speed, bins = range(0, max_vel, 1))
+        print(config["task"], hist, bin_edges)
+        print(config["task"], "max yaw speed:", yaw_speed.max() if len(yaw_speed) else 0)
+        y = [0] + [freq / len(yaw_speed) for freq in hist]
+        x = range(0, max_vel, 1)
+        plt.plot(x, y, lw=1.2, alpha=0.6, label=config["task"])
+
+    plt.xticks(range(0, max_vel + 2, 2))
+    plt.xlim((0, max_vel))
+    plt.ylim((0, 1))
+    plt.axvline(x=3, color='r', linestyle='--', linewidth=0.8)
+    plt.xlabel("angular velocity (degrees per second)")
+    plt.title("the distribution of angular velocity of satellites")
+    plt.legend()
+    plt.savefig("plot_figs/angular_velocity_dist.png")
+    plt.close()
+
+    fout = open("angular_velocity.csv", "w")
+    fout.write("task,gs_id,axis,samples," + ",".join(["p{}".format(pct) for pct in percentiles]))
+    fout.write("," + ",".join(["bin_{}".format(v) for v in range(max_vel)]) + "\n")
+    for row in table:
+        fout.write(",".join([str(row[0]), str(row[1]), row[2], str(row[3])] + ["{:.4f}".format(v) for v in row[4:]]) + "\n")
+    fout.close()
@@ -0,0 +1,200 @@
+import os
+import sys
+import json
+import time
+import copy
+import subprocess
+import gen_visibility
+import registry
+
+schedulers = ["max_visible_time", "min_distance", "max_matching", "gs_state_aware_matching", "dp_scheduler"]
+tolerance = 0.2
+noise_floor = 0.05
+startup_budget = 0.5
+heavy_modules = ["matplotlib", "scipy"]
+
+def synthetic_points(bench, bench_dir):
+    spec = bench["synthetic"]
+    points = []
+    for constellation in spec["constellations"]:
+        altitude, inclination, Q, P = constellation
+        data_key = "walker-{}-{}-{}x{}".format(altitude, inclination, P, Q)
+        base = {
+            "task": data_key,
+            "data_dir": os.path.join(bench_dir, "data", data_key),
+            "constellation": constellation,
+            "gs_file": spec["gs_file"],
+            "min_elevation": spec.get("min_elevation", 25),
+            "begin": 0,
+            "end": max(spec["horizon"]),
+            "step": spec.get("step", 10),
+            "sat_num": P * Q,
+            "gs_num": max(spec["gs_num"]),
+            "yaw_speed": spec.get("yaw_speed", 3),
+            "pitch_speed": spec.get("pitch_speed", 3),
+            "output_dir": os.path.join(bench_dir, "output"),
+            "mode": "build"
+        }
+        if not os.path.exists(os.path.join(base["data_dir"], "offsets.npy")):
+            print("Generating {}...".format(data_key))
+            gen_visibility.generate(base, "packed")
+        for gs_num in spec["gs_num"]:
+            for horizon in spec["horizon"]:
+                config = copy.deepcopy(base)
+                config["gs_num"] = gs_num
+                config["view"] = {"stations": list(range(gs_num))}
+                config["end"] = horizon
+                points.append(("synthetic", config))
+    return points
+
+def recorded_points(bench):
+    points = []
+    for config_path in bench.get("recorded", []):
+        json_f = open(config_path)
+        config = json.loads(json_f.read())
+        json_f.close()
+        if not os.path.exists(config["data_dir"]):
+            print("Skipping {}: {} not found".format(config_path, config["data_dir"]))
+            continue
+        for horizon in bench.get("recorded_horizon", [config["end"]]):
+            config = copy.deepcopy(config)
+            config["end"] = config["begin"] + horizon
+            points.append(("recorded", config))
+    return points
+
+def point_key(result):
+    return (result["dataset"], result["task"], result["algorithm"], result["gs_num"], result["sat_num"], result["horizon"])
+
+def run_point(bench_dir, dataset, config, algo, repeat=1):
+    config_path = os.path.join(bench_dir, "config.json")
+    with open(config_path, "w") as f:
+        json.dump(config, f)
+    proc = subprocess.Popen([sys.executable, __file__, "--child", config_path, algo, str(repeat)], stdout=subprocess.PIPE)
+    out = proc.stdout.read()
+    _, status, rusage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    steps = (config["end"] - config["begin"]) // config["step"]
+    result = {
+        "dataset": dataset,
+        "task": config["task"],
+        "algorithm": algo,
+        "gs_num": config["gs_num"],
+        "sat_num": config["sat_num"],
+        "horizon": config["end"] - config["begin"],
+        "steps": steps,
+        "exit_code": proc.returncode,
+        "peak_rss": rusage.ru_maxrss * 1024
+    }
+    if proc.returncode == 0:
+        child = json.loads(out.decode().strip().split("\n")[-1])
+        result["wall_time"] = child["wall_time"]
+        result["time_per_step"] = child["wall_time"] / steps
+    return result
+
+def compare(results, baseline):
+    base = {point_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        ref = base.get(point_key(result))
+        if ref is None or "wall_time" not in ref or "wall_time" not in result:
+            continue
+        for metric in ["wall_time", "peak_rss"]:
+            slack = noise_floor if metric == "wall_time" else 0
+            if result[metric] > ref[metric] * (1 + tolerance) + slack:
+                regressions.append((result, metric, ref[metric]))
+    return regressions
+
+def startup(algo, repeat=5):
+    # Cost of a short CLI job before it does any work: interpreter start-up,
+    # runner imports and loading the scheduler
+    script = "import sys, runner, registry; registry.load(sys.argv[1]); print(' '.join(sorted(set(sys.modules) & set(sys.argv[2:]))))"
+    wall_time = None
+    for _ in range(repeat):
+        begin_time = time.time()
+        out = subprocess.run([sys.executable, "-c", script, algo] + heavy_modules, cwd=registry.package_dir, stdout=subprocess.PIPE, check=True).stdout
+        elapsed = time.time() - begin_time
+        wall_time = elapsed if wall_time is None else min(wall_time, elapsed)
+    return {"algorithm": algo, "wall_time": wall_time, "heavy_modules": out.decode().split()}
+
+def startup_budgets(spec, algos):
+    # Schedulers that need SciPy cannot start within the default budget, so
+    # the config may give them budgets of their own
+    budget = spec.get("budget", startup_budget)
+    return {algo: spec.get("budgets", {}).get(algo, budget) for algo in algos}
+
+def child(config_path, algo, repeat):
+    json_f = open(config_path)
+    config = json.loads(json_f.read())
+    json_f.close()
+    module = registry.load(algo)
+    devnull = open(os.devnull, "w")
+    stdout, sys.stdout = sys.stdout, devnull
+    wall_time = None
+    for _ in range(repeat):
+        begin_time = time.time()
+        module.run(config)
+        elapsed = time.time() - begin_time
+        wall_time = elapsed if wall_time is None else min(wall_time, elapsed)
+    sys.stdout = stdout
+    print(json.dumps({"wall_time": wall_time}))
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+        exit(0)
+
+    if len(sys.argv) < 2:
+        print("Usage: python benchmark.py <benchmark config> [results file] [baseline file]")
+        exit(0)
+
+    json_f = open(sys.argv[1])
+    bench = json.loads(json_f.read())
+    json_f.close()
+    results_path = sys.argv[2] if len(sys.argv) > 2 else "benchmark_results.json"
+    bench_dir = bench.get("bench_dir", "benchmark")
+    os.makedirs(os.path.join(bench_dir, "output"), exist_ok=True)
+
+    over_budget = []
+    if "startup" in bench:
+        budgets = startup_budgets(bench["startup"], bench.get("schedulers", schedulers))
+        for algo, budget in budgets.items():
+            result = startup(algo, bench["startup"].get("repeat", 5))
+            print("Start-up {}: {:.3f}s{}".format(algo, result["wall_time"], ", loads " + " ".join(result["heavy_modules"]) if result["heavy_modules"] else ""))
+            if result["wall_time"] > budget:
+                result["budget"] = budget
+                over_budget.append(result)
+
+    points = []
+    if "synthetic" in bench:
+        points += synthetic_points(bench, bench_dir)
+    points += recorded_points(bench)
+
+    results = []
+    for dataset, config in points:
+        for algo in bench.get("schedulers", schedulers):
+            result = run_point(bench_dir, dataset, config, algo, bench.get("repeat", 1))
+            results.append(result)
+            if result["exit_code"] == 0:
+                print("{} {} gs={} sat={} horizon={}: {:.2f}s, {:.2f}ms/step, {:.1f}MB".format(
+                    result["task"], algo, result["gs_num"], result["sat_num"], result["horizon"],
+                    result["wall_time"], result["time_per_step"] * 1000, result["peak_rss"] / (1 << 20)))
+            else:
+                print("{} {}: failed with exit code {}".format(result["task"], algo, result["exit_code"]))
+
+    with open(results_path, "w") as f:
+        json.dump(results, f, indent=1)
+
+    for result in over_budget:
+        print("Regression: start-up of {} took {:.3f}s, budget {:.3f}s".format(result["algorithm"], result["wall_time"], result["budget"]))
+    if len(sys.argv) > 3:
+        with open(sys.argv[3]) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline)
+        for result, metric, ref in regressions:
+            print("Regression: {} {} gs={} sat={} horizon={} {} {:.3f} -> {:.3f}".format(
+                result["task"], result["algorithm"], result["gs_num"], result["sat_num"], result["horizon"],
+                metric, ref, result[metric]))
+        if regressions:
+            exit(1)
+    if over_budget:
+        exit(1)
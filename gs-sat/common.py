@@ -2,8 +2,9 @@ import os
 import math
 import numpy as np
 import sys
-import matplotlib.pyplot as plt
 import random
+import functools
+import schedule
 
 def loadFile(filename):
     res = []
@@ -14,21 +15,157 @@ def loadFile(filename):
     return res
 
 def loadData(config, curtime):
-    data_dir = config["data_dir"]
+    gs_sat_vis = loadArray(config, curtime)
+    return [[int(elem[0]), int(elem[1]), elem[2], elem[3], elem[4]] for elem in gs_sat_vis.tolist()]
+
+def loadArrayFile(filename):
+    with open(filename) as f:
+        return np.array(f.read().split(), dtype=np.float64).reshape(-1, 5)
+
+view_cache = {}
+
+def viewMap(config):
+    multi_ant_gs_num = config.get("multi_ant_gs_num", 0)
+    ant_num = config.get("ant_num", 1)
+    real_gs_num = config["gs_num"] - (ant_num - 1) * multi_ant_gs_num
+    stations = config["view"].get("stations", list(range(real_gs_num)))
+    key = (tuple(stations), multi_ant_gs_num, ant_num)
+    if key not in view_cache:
+        counts = np.zeros(max(stations) + 1, dtype=np.int64)
+        first = np.zeros(max(stations) + 1, dtype=np.int64)
+        cnt = 0
+        for i, gs_id in enumerate(stations):
+            first[gs_id] = cnt
+            counts[gs_id] = ant_num if i < multi_ant_gs_num else 1
+            cnt += counts[gs_id]
+        assert cnt == config["gs_num"], "view does not match gs_num"
+        view_cache[key] = (counts, first)
+    return view_cache[key]
+
+def applyView(config, gs_sat_vis):
+    counts, first = viewMap(config)
+    gs_id = gs_sat_vis[:, 0].astype(np.int64)
+    gs_id[gs_id >= len(counts)] = -1
+    rep = np.where(gs_id >= 0, counts[gs_id], 0)
+    res = np.repeat(gs_sat_vis, rep, axis=0)
+    group_begin = np.repeat(np.cumsum(rep) - rep, rep)
+    res[:, 0] = np.repeat(first[gs_id], rep) + np.arange(len(res)) - group_begin
+    return res
+
+packed_cache = {}
+packed_columns = ["gs_id", "sat_id", "pitch", "yaw", "dist"]
+
+def loadPacked(data_dir):
+    if data_dir not in packed_cache:
+        times = np.load(os.path.join(data_dir, "times.npy"))
+        offsets = np.load(os.path.join(data_dir, "offsets.npy"))
+        columns = [np.load(os.path.join(data_dir, name + ".npy"), mmap_mode="r") for name in packed_columns]
+        packed_cache[data_dir] = ({curtime: idx for idx, curtime in enumerate(times.tolist())}, offsets, columns)
+    return packed_cache[data_dir]
+
+def loadRaw(data_dir, curtime):
+    if data_dir in packed_cache or os.path.exists(os.path.join(data_dir, "offsets.npy")):
+        time_idx, offsets, columns = loadPacked(data_dir)
+        idx = time_idx[curtime]
+        return np.stack([column[offsets[idx]: offsets[idx + 1]] for column in columns], axis=1).astype(np.float64)
     vis_file = os.path.join(data_dir, "{}.txt".format(curtime))
-    gs_sat_vis = loadFile(vis_file)
+    return loadArrayFile(vis_file)
+
+preload_cache = {}
+
+def preload(config):
+    begin, end, step = config["begin"], config["end"], config["step"]
+    cache = preload_cache.setdefault(config["data_dir"], {})
+    for curtime in range(begin, end, step):
+        if curtime not in cache:
+            cache[curtime] = loadRaw(config["data_dir"], curtime)
+
+def loadArray(config, curtime):
+    data_dir = config["data_dir"]
+    if curtime in preload_cache.get(data_dir, {}):
+        gs_sat_vis = preload_cache[data_dir][curtime]
+    else:
+        gs_sat_vis = loadRaw(data_dir, curtime)
+    if "view" in config:
+        gs_sat_vis = applyView(config, gs_sat_vis)
     return gs_sat_vis
 
+def loadPackedRange(config, times):
+    # Consecutive slices of a packed directory are one contiguous block of
+    # rows, so they are read with a single slice per column.
+    data_dir = config["data_dir"]
+    if data_dir in preload_cache or not (data_dir in packed_cache or os.path.exists(os.path.join(data_dir, "offsets.npy"))):
+        return None
+    time_idx, packed_offsets, columns = loadPacked(data_dir)
+    idx = [time_idx.get(curtime, -1) for curtime in (times[0], times[-1])]
+    if idx[0] == -1 or idx[1] - idx[0] != len(times) - 1 or any(time_idx.get(curtime) != idx[0] + i for i, curtime in enumerate(times)):
+        return None
+    lo, hi = packed_offsets[idx[0]], packed_offsets[idx[1] + 1]
+    data = np.stack([column[lo: hi] for column in columns], axis=1).astype(np.float64)
+    offsets = packed_offsets[idx[0]: idx[1] + 2] - lo
+    if "view" in config:
+        slice_idx = np.repeat(np.arange(len(times)), np.diff(offsets))
+        data = applyView(config, np.concatenate([data, slice_idx[:, None]], axis=1))
+        offsets = np.searchsorted(data[:, 5], np.arange(len(times) + 1))
+        data = data[:, :5]
+    return data, offsets.astype(np.int64)
+
+def loadRange(config, lo, hi):
+    times = range(config["begin"], config["end"], config["step"])[lo: hi]
+    if times:
+        res = loadPackedRange(config, times)
+        if res is not None:
+            return res
+    slices = [loadArray(config, curtime) for curtime in times]
+    offsets = np.zeros(len(slices) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(vis) for vis in slices])
+    data = np.concatenate(slices) if slices else np.zeros((0, 5))
+    return data, offsets
+
+def loadSeries(config):
+    return loadRange(config, 0, len(range(config["begin"], config["end"], config["step"])))
+
 def output(config, result, algo, eval=False):
-    output_name = ("[Eval] " if eval else "") + "{} - {}.txt".format(config["task"], algo)
-    
-    output_file = os.path.join(config["output_dir"], output_name)
-    fout = open(output_file, "w")
-    for matching in result:
-        fout.write(" ".join([str(sat_id) for sat_id in matching]))
-        fout.write("\n")
-    fout.close()
+    output_format = config.get("output_format", "binary")
+    output_file = os.path.join(config["output_dir"], schedule.fileName(config, algo, eval))
+    if output_format in ["binary", "both"]:
+        schedule.write(output_file + ".sched", result, config, algo, eval)
+    if output_format in ["text", "both"]:
+        schedule.writeText(output_file + ".txt", result)
 
+def splitByGs(gs_sat_vis, gs_num):
+    order = np.argsort(gs_sat_vis[:, 0], kind="stable")
+    gs_sat_vis = gs_sat_vis[order]
+    bounds = np.searchsorted(gs_sat_vis[:, 0], np.arange(gs_num + 1))
+    res = []
+    for b, e in zip(bounds[:-1], bounds[1:]):
+        sat_ids = gs_sat_vis[b:e, 1].astype(np.int64)
+        res.append((sat_ids, gs_sat_vis[b:e, 2], gs_sat_vis[b:e, 3], np.argsort(sat_ids, kind="stable")))
+    return res
+
+def lookup(gs_vis, sat_ids):
+    vis_sat_ids, _, _, sorter = gs_vis
+    if len(vis_sat_ids) == 0:
+        return np.zeros(len(sat_ids), dtype=bool), np.zeros(len(sat_ids), dtype=np.int64)
+    idx = sorter[np.minimum(np.searchsorted(vis_sat_ids, sat_ids, sorter=sorter), len(vis_sat_ids) - 1)]
+    return vis_sat_ids[idx] == sat_ids, idx
+
+def tracing_array(target_pitch_angle, target_yaw_angle, cur_pitch_angle, cur_yaw_angle, max_pitch_change, max_yaw_change):
+    delta_yaw = target_yaw_angle - cur_yaw_angle
+    costs = np.abs([delta_yaw, delta_yaw - 360, delta_yaw + 360])
+    yaw_cost = costs.min(axis=0)
+    direction = np.where(costs[0] == yaw_cost, np.sign(delta_yaw), np.where(costs[1] == yaw_cost, np.sign(delta_yaw - 360), np.sign(delta_yaw + 360)))
+    moved_yaw_angle = cur_yaw_angle + direction * max_yaw_change
+    moved_yaw_angle = np.where(moved_yaw_angle >= 360, moved_yaw_angle - 360, moved_yaw_angle)
+    moved_yaw_angle = np.where(moved_yaw_angle < 0, moved_yaw_angle + 360, moved_yaw_angle)
+    cur_yaw_angle = np.where(max_yaw_change >= yaw_cost, target_yaw_angle, moved_yaw_angle)
+
+    delta_pitch = target_pitch_angle - cur_pitch_angle
+    moved_pitch_angle = cur_pitch_angle + np.sign(delta_pitch) * max_pitch_change
+    cur_pitch_angle = np.where(max_pitch_change >= np.abs(delta_pitch), target_pitch_angle, moved_pitch_angle)
+    return cur_pitch_angle, cur_yaw_angle
+
+@functools.lru_cache(maxsize=1 << 18)
 def tracing(target_pitch_angle, target_yaw_angle, cur_pitch_angle, cur_yaw_angle, max_pitch_change, max_yaw_change):
     delta_yaw = target_yaw_angle - cur_yaw_angle
     yaw_cost = min(math.fabs(delta_yaw), math.fabs(delta_yaw - 360), math.fabs(delta_yaw + 360))
@@ -138,33 +275,10 @@ def eval(config, result, algo):
         if mode == "debug":
             print(gs_state)
 
-    if "multi_ant_gs_num" in config:
-        multi_ant_gs_num = config["multi_ant_gs_num"]
-    else:
-        multi_ant_gs_num = 0
-    
-    if "ant_num" in config:
-        ant_num = config["ant_num"]
-    else:
-        ant_num = 1
-
-    real_gs_num = gs_num - (ant_num - 1) * multi_ant_gs_num
-    gs_sw_num = [0] * real_gs_num
-    gs_fr_usage = [0] * real_gs_num
-    for i in range(gs_num):
-        if i < ant_num * multi_ant_gs_num:
-            real_gs_id = i // ant_num
-        else:
-            real_gs_id = i - (ant_num - 1) * multi_ant_gs_num
-        gs_sw_num[real_gs_id] += switch_num[i]
-        gs_fr_usage[real_gs_id] += feeder_time[i]
-    for i in range(multi_ant_gs_num):
-        gs_sw_num[i] /= ant_num
-        gs_fr_usage[i] /= ant_num
-    avg_switch_freq = sum(gs_sw_num) / real_gs_num / (end - begin) * 60 * 60
-    avg_resource_usage = sum(gs_fr_usage) / real_gs_num / (end - begin)
+    avg_switch_freq, avg_resource_usage = usageStats(config, switch_num, feeder_time)
 
     '''
+    import matplotlib.pyplot as plt
     max_vel = 300
     hist, bin_edges = np.histogram(dstats, bins = range(0, max_vel, 10))
     print(hist, bin_edges)
@@ -198,14 +312,45 @@ def eval(config, result, algo):
 
     output(config, eval_res, algo, True)
 
-    sample_num = 100000
+    breakdown_rate = breakdownRate(config, np.array(eval_res)[None], serviceSamples(config, len(eval_res)))[0]
+    print("Average breakdown rate: {:.2%}".format(breakdown_rate))
+    return avg_switch_freq, avg_resource_usage,  breakdown_rate
+
+def antennaLayout(config):
+    gs_num = config["gs_num"]
+    multi_ant_gs_num = config.get("multi_ant_gs_num", 0)
+    ant_num = config.get("ant_num", 1)
+    real_gs_num = gs_num - (ant_num - 1) * multi_ant_gs_num
+    return multi_ant_gs_num, ant_num, real_gs_num
+
+def usageStats(config, switch_num, feeder_time):
+    begin, end = config["begin"], config["end"]
+    multi_ant_gs_num, ant_num, real_gs_num = antennaLayout(config)
+    gs_sw_num = [0] * real_gs_num
+    gs_fr_usage = [0] * real_gs_num
+    for i in range(config["gs_num"]):
+        if i < ant_num * multi_ant_gs_num:
+            real_gs_id = i // ant_num
+        else:
+            real_gs_id = i - (ant_num - 1) * multi_ant_gs_num
+        gs_sw_num[real_gs_id] += switch_num[i]
+        gs_fr_usage[real_gs_id] += feeder_time[i]
+    for i in range(multi_ant_gs_num):
+        gs_sw_num[i] /= ant_num
+        gs_fr_usage[i] /= ant_num
+    avg_switch_freq = sum(gs_sw_num) / real_gs_num / (end - begin) * 60 * 60
+    avg_resource_usage = sum(gs_fr_usage) / real_gs_num / (end - begin)
+    return avg_switch_freq, avg_resource_usage
+
+def serviceSamples(config, num_slices, sample_num=100000):
+    multi_ant_gs_num, ant_num, real_gs_num = antennaLayout(config)
     random.seed(20231109)
-    
-    service_samples = []
+
+    samples = []
     for _ in range(sample_num):
         pv = random.paretovariate(1.0)
-        service_duration = min(len(eval_res), int(pv))
-        service_begin = random.randint(0, len(eval_res) - service_duration)
+        service_duration = min(num_slices, int(pv))
+        service_begin = random.randint(0, num_slices - service_duration)
         service_end = service_begin + service_duration
         if multi_ant_gs_num == real_gs_num:  
             service_gs = random.randint(0, real_gs_num - 1)
@@ -216,22 +361,74 @@ def eval(config, result, algo):
                 service_gs = random.randint(0, multi_ant_gs_num - 1)
             else:
                 service_gs = random.randint(multi_ant_gs_num, real_gs_num - 1)
+        samples.append((service_begin, service_end, service_gs))
+    return np.array(samples, dtype=np.int64)
 
-        service_breakdown_duration = 0
-        for service_time in range(service_begin, service_end):
-            bkdown = True
-            if service_gs < multi_ant_gs_num:
-                for gs_id in range(service_gs * ant_num, (service_gs + 1) * ant_num):
-                    if eval_res[service_time][gs_id] != -1:
-                        bkdown = False
-            else:
-                gs_id = service_gs + (ant_num - 1) * multi_ant_gs_num
-                if eval_res[service_time][gs_id] != -1:
-                    bkdown = False
-            if bkdown:
-                service_breakdown_duration += 1
-        service_samples.append(service_breakdown_duration / service_duration)
-           
-    breakdown_rate = sum(service_samples) / len(service_samples)
-    print("Average breakdown rate: {:.2%}".format(breakdown_rate))
-    return avg_switch_freq, avg_resource_usage,  breakdown_rate
\ No newline at end of file
+def breakdownRate(config, eval_res, samples):
+    # eval_res is [variant, slice, gs]; returns one breakdown rate per variant
+    multi_ant_gs_num, ant_num, real_gs_num = antennaLayout(config)
+    up = eval_res != -1
+    multi_up = up[:, :, :multi_ant_gs_num * ant_num].reshape(up.shape[0], up.shape[1], multi_ant_gs_num, ant_num).any(axis=3)
+    down = ~np.concatenate([multi_up, up[:, :, multi_ant_gs_num * ant_num:]], axis=2)
+    down_cnt = np.zeros([len(eval_res), down.shape[1] + 1, real_gs_num], dtype=np.int64)
+    down_cnt[:, 1:] = np.cumsum(down, axis=1)
+
+    service_begin, service_end, service_gs = samples.T
+    rates = []
+    for variant_cnt in down_cnt:
+        breakdown = variant_cnt[service_end, service_gs] - variant_cnt[service_begin, service_gs]
+        service_samples = (breakdown / (service_end - service_begin)).tolist()
+        rates.append(sum(service_samples) / len(service_samples))
+    return rates
+
+def evalVariants(config, result, speeds):
+    # Evaluates one schedule under several (yaw_speed, pitch_speed) pairs at once
+    gs_num = config["gs_num"]
+    sat_num = config["sat_num"]
+    begin, end, step = config["begin"], config["end"], config["step"]
+    speeds = np.array(speeds, dtype=float)
+    variant_num = len(speeds)
+    max_yaw_change = step * speeds[:, 0:1]
+    max_pitch_change = step * speeds[:, 1:2]
+    cur_sat = np.full([variant_num, gs_num], -1, dtype=np.int64)
+    cur_pitch = np.full([variant_num, gs_num], 90, dtype=float)
+    cur_yaw = np.zeros([variant_num, gs_num], dtype=float)
+    switch_num = np.zeros([variant_num, gs_num], dtype=np.int64)
+    feeder_time = np.zeros([variant_num, gs_num], dtype=np.int64)
+    eval_res = np.full([variant_num, len(result), gs_num], -1, dtype=np.int64)
+
+    for t_idx, (curtime, matching) in enumerate(zip(range(begin, end, step), result)):
+        matching = np.asarray(matching, dtype=np.int64)
+        gs_sat_vis = loadArray(config, curtime)
+        vis_key = gs_sat_vis[:, 0].astype(np.int64) * sat_num + gs_sat_vis[:, 1].astype(np.int64)
+        sorter = np.argsort(vis_key, kind="stable")
+        target_key = np.arange(gs_num) * sat_num + matching
+        if len(vis_key) == 0:
+            idx = sel = np.zeros(0, dtype=np.int64)
+        else:
+            idx = sorter[np.minimum(np.searchsorted(vis_key, target_key, sorter=sorter), len(vis_key) - 1)]
+            sel = np.nonzero((matching >= 0) & (vis_key[idx] == target_key))[0]
+        target_sat = matching[sel]
+        target_pitch, target_yaw = gs_sat_vis[idx[sel], 2], gs_sat_vis[idx[sel], 3]
+
+        next_pitch, next_yaw = tracing_array(target_pitch, target_yaw, cur_pitch[:, sel], cur_yaw[:, sel], max_pitch_change, max_yaw_change)
+        aligned = (next_pitch == target_pitch) & (next_yaw == target_yaw)
+        same = cur_sat[:, sel] == target_sat
+        switch_num[:, sel] += aligned & ~same
+
+        variant_idx, sel_idx = np.nonzero(aligned & same)
+        _, first = np.unique(variant_idx * sat_num + target_sat[sel_idx], return_index=True)
+        flag = np.zeros(aligned.shape, dtype=bool)
+        flag[variant_idx[first], sel_idx[first]] = True
+        feeder_time[:, sel] += step * flag
+        eval_res[:, t_idx, sel] = np.where(flag, target_sat, -1)
+
+        cur_sat[:, sel] = np.where(aligned, target_sat, -1)
+        cur_pitch[:, sel], cur_yaw[:, sel] = next_pitch, next_yaw
+
+    breakdown_rates = breakdownRate(config, eval_res, serviceSamples(config, len(result)))
+    res = []
+    for variant in range(variant_num):
+        avg_switch_freq, avg_resource_usage = usageStats(config, switch_num[variant].tolist(), feeder_time[variant].tolist())
+        res.append((avg_switch_freq, avg_resource_usage, breakdown_rates[variant]))
+    return res
@@ -3,50 +3,51 @@ import numpy as np
 from scipy.optimize import linear_sum_assignment
 import time
 import multiprocessing
+import profiler
 
 max_stable_time = 20
 active_state_num = 10
-processor_num = multiprocessing.cpu_count() - 1
-
-def compute(init_state, peek_map, gs_num, sat_num, max_pitch_change, max_yaw_change):
-    cost = np.empty([gs_num, sat_num], dtype=int)
-    for gs_id in range(gs_num):
-        for sat_id in range(sat_num):
-            weight = 0
-            cur_sat_id, cur_pitch_angle, cur_yaw_angle = init_state[gs_id]
-            for gs_map in peek_map:
-                target_state = (-1, 90, 0)
-                for elem in gs_map[gs_id]:
-                    if elem[1] == sat_id:
-                        target_state = (elem[1:4])
-                        break
-                target_sat_id, target_pitch_angle, target_yaw_angle = target_state
-                if target_sat_id == -1:
-                    continue
-                cur_pitch_angle, cur_yaw_angle = common.tracing(target_pitch_angle, target_yaw_angle, cur_pitch_angle, cur_yaw_angle, max_pitch_change, max_yaw_change)
-
-                if cur_pitch_angle == target_pitch_angle and cur_yaw_angle == target_yaw_angle:            
-                    if cur_sat_id == target_sat_id:
-                        weight += 1
-                    else:
-                        cur_sat_id = target_sat_id
-                else:
-                    cur_sat_id = -1
-            cost[gs_id][sat_id] = -weight
+processor_num = max(1, multiprocessing.cpu_count() - 1)
+
+def score(args):
+    window, gs_state, max_pitch_change, max_yaw_change = args
+    candidates = np.unique(np.concatenate([gs_vis[0] for gs_vis in window]))
+    cur_sat_id, cur_pitch_angle, cur_yaw_angle = gs_state
+    cur_sat = np.full(len(candidates), cur_sat_id, dtype=np.int64)
+    cur_pitch = np.full(len(candidates), cur_pitch_angle, dtype=float)
+    cur_yaw = np.full(len(candidates), cur_yaw_angle, dtype=float)
+    weight = np.zeros(len(candidates), dtype=int)
+    weights = np.empty([len(window), len(candidates)], dtype=int)
+    for peek, gs_vis in enumerate(window):
+        found, idx = common.lookup(gs_vis, candidates)
+        sel, idx = np.nonzero(found)[0], idx[found]
+        target_pitch, target_yaw = gs_vis[1][idx], gs_vis[2][idx]
+        cur_pitch[sel], cur_yaw[sel] = common.tracing_array(target_pitch, target_yaw, cur_pitch[sel], cur_yaw[sel], max_pitch_change, max_yaw_change)
+        aligned = (cur_pitch[sel] == target_pitch) & (cur_yaw[sel] == target_yaw)
+        weight[sel] += aligned & (cur_sat[sel] == candidates[sel])
+        cur_sat[sel] = np.where(aligned, candidates[sel], -1)
+        weights[peek] = weight
+    return candidates, weights
+
+def compute(rows, peek, gs_num, sat_num):
+    cost = np.zeros([gs_num, sat_num], dtype=int)
+    for gs_id, (candidates, weights) in enumerate(rows):
+        cost[gs_id, candidates] = -weights[peek - 1]
 
     _, matching = linear_sum_assignment(cost)
     return matching
 
 def simulate(gs_state, peek_map, gs_num, sat_num, matching, max_pitch_change, max_yaw_change, step):
     gain = 0
+    history = []
     for gs_map in peek_map:
         sat_used = [False] * sat_num
         target_state = [(-1, 90, 0)] * gs_num
 
         for gs_id in range(gs_num):
-            for elem in gs_map[gs_id]:
-                if elem[1] == matching[gs_id]:
-                    target_state[gs_id] = (elem[1:4])
+            found, idx = common.lookup(gs_map[gs_id], matching[gs_id: gs_id + 1])
+            if found[0]:
+                target_state[gs_id] = (int(matching[gs_id]), float(gs_map[gs_id][1][idx[0]]), float(gs_map[gs_id][2][idx[0]]))
 
         for gs_id in range(gs_num):
             cur_sat_id, cur_pitch_angle, cur_yaw_angle = gs_state[gs_id]
@@ -68,16 +69,24 @@ def simulate(gs_state, peek_map, gs_num, sat_num, matching, max_pitch_change, ma
                 cur_sat_id = -1
             
             gs_state[gs_id] = (cur_sat_id, cur_pitch_angle, cur_yaw_angle)
-    return gs_state, gain
-
-def get_next_state(args):
-    peek_map, cur_gs_state, cur_matching, cur_idx, next_idx, gs_num, sat_num, max_pitch_change, max_yaw_change, cur_fl_duration, step = args
-    target_matching = compute(cur_gs_state, peek_map, gs_num, sat_num, max_pitch_change, max_yaw_change)
-    next_gs_state, fl_duration_gain = simulate(cur_gs_state, peek_map, gs_num, sat_num, target_matching, max_pitch_change, max_yaw_change, step)
-    next_matching = tuple([state[0] for state in next_gs_state])
-    next_antenna = [[state[1], state[2]] for state in next_gs_state]
-    next_fl_duration = cur_fl_duration + fl_duration_gain
-    return [next_idx, next_matching, next_fl_duration, next_antenna, target_matching, cur_idx, cur_matching]
+        history.append((list(gs_state), gain))
+    return history
+
+def get_next_states(args):
+    window, rows, cur_gs_state, cur_matching, cur_idx, gs_num, sat_num, max_pitch_change, max_yaw_change, cur_fl_duration, step = args
+    next_state_list = []
+    simulated = {}
+    for peek in range(1, len(window) + 1):
+        target_matching = compute(rows, peek, gs_num, sat_num)
+        key = tuple(target_matching.tolist())
+        if key not in simulated:
+            simulated[key] = simulate(list(cur_gs_state), window, gs_num, sat_num, target_matching, max_pitch_change, max_yaw_change, step)
+        next_gs_state, fl_duration_gain = simulated[key][peek - 1]
+        next_matching = tuple([state[0] for state in next_gs_state])
+        next_antenna = [[state[1], state[2]] for state in next_gs_state]
+        next_fl_duration = cur_fl_duration + fl_duration_gain
+        next_state_list.append([cur_idx + peek, next_matching, next_fl_duration, next_antenna, target_matching, cur_idx, cur_matching])
+    return next_state_list
 
 def run(config):
     begin, end, step = config["begin"], config["end"], config["step"]
@@ -86,17 +95,14 @@ def run(config):
     yaw_speed, pitch_speed = config["yaw_speed"], config["pitch_speed"]
     max_pitch_change = step * pitch_speed
     max_yaw_change = step * yaw_speed
+    stable_slices = config.get("max_stable_time", max_stable_time) // step
+    active_num = config.get("active_state_num", active_state_num)
+    workers = config.get("processor_num", processor_num)
 
-    pool = multiprocessing.Pool(processor_num)
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
     vis_map = []
     for curtime in range(begin, end, step):
-        gs_sat_vis = common.loadData(config, curtime)
-        gs_map = []
-        for _ in range(gs_num):
-            gs_map.append([])
-        for elem in gs_sat_vis:
-            gs_map[elem[0]].append(elem)
-        vis_map.append(gs_map)
+        vis_map.append(common.splitByGs(common.loadArray(config, curtime), gs_num))
 
     dp = []
     dp.append({
@@ -121,34 +127,56 @@ def run(config):
             fl_duration_list.append(fl_duration)
         
         fl_duration_list.sort(reverse=True)
-        fl_duration_threshold = fl_duration_list[:active_state_num][-1]
+        fl_duration_threshold = fl_duration_list[:active_num][-1]
 
-        task_list = []
+        window = vis_map[cur_idx: min(cur_idx + stable_slices - 1, num_slices)]
+        expanded = []
         for key, value in dp[cur_idx].items():
             cur_matching = key
             cur_fl_duration = value[0]
             cur_antenna = value[1]
 
             if cur_fl_duration < fl_duration_threshold:
+                if profiler.enabled:
+                    profiler.count("dp states pruned")
                 continue
+            if profiler.enabled:
+                profiler.count("dp states expanded")
 
             cur_gs_state = []
             for gs_id in range(gs_num):
                 cur_gs_state.append((cur_matching[gs_id], cur_antenna[gs_id][0], cur_antenna[gs_id][1])) 
+            expanded.append((cur_matching, cur_fl_duration, cur_gs_state))
 
-            for peek in range(1, max_stable_time // step):
-                next_idx = cur_idx + peek
-                if next_idx > num_slices:
-                    break
-                peek_map = vis_map[cur_idx: next_idx]
-                task_list.append((peek_map, cur_gs_state, cur_matching, cur_idx, next_idx, gs_num, sat_num, max_pitch_change, max_yaw_change, cur_fl_duration, step))
-    
-        next_state_list = pool.map(get_next_state, task_list)
+        if len(window) == 0:
+            continue
+
+        # Rows of the cost matrix only depend on one station's state, so
+        # states that share a station state share its scored row.
+        row_keys = {}
+        for _, _, cur_gs_state in expanded:
+            for gs_id in range(gs_num):
+                row_keys.setdefault((gs_id, cur_gs_state[gs_id]), len(row_keys))
+        if profiler.enabled:
+            profiler.count("dp rows scored", len(row_keys))
+            profiler.count("dp rows reused", len(expanded) * gs_num - len(row_keys))
+        score_list = [([gs_vis[gs_id] for gs_vis in window], gs_state, max_pitch_change, max_yaw_change) for gs_id, gs_state in row_keys]
+        row_list = profiler.pool_map(pool, score, score_list)
+
+        task_list = []
+        for cur_matching, cur_fl_duration, cur_gs_state in expanded:
+            rows = [row_list[row_keys[(gs_id, cur_gs_state[gs_id])]] for gs_id in range(gs_num)]
+            task_list.append((window, rows, cur_gs_state, cur_matching, cur_idx, gs_num, sat_num, max_pitch_change, max_yaw_change, cur_fl_duration, step))
+
+        next_state_list = [next_state for next_states in profiler.pool_map(pool, get_next_states, task_list) for next_state in next_states]
         for next_state in next_state_list:
             next_idx, next_matching, next_fl_duration = next_state[:3]
             if next_matching not in dp[next_idx] or next_fl_duration > dp[next_idx][next_matching][0]:
                 dp[next_idx][next_matching] = next_state[2:]
 
+    if pool is not None:
+        pool.close()
+
     max_fl_duration = -1
     opt_key = None
     for key, value in dp[num_slices].items():
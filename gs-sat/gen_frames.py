@@ -2,6 +2,7 @@ import os
 from scipy.spatial import ConvexHull
 import json
 import common
+import schedule
 
 frame_num = 600
 data_dir = "/home/chenyuxuan/satnet/data/20230927qb/Jan1st"
@@ -52,9 +53,7 @@ for algorithm in [ "max_visible_time", "min_distance", "max_matching", "gs_state
     max_pitch_change = step * pitch_speed
     max_yaw_change = step * yaw_speed
 
-    result_path = result_pfx + algorithm + ".txt"
-    result_file = open(result_path)
-    result = [[int(elem) for elem in line.split(' ')] for line in result_file.readlines()]
+    result = schedule.load(schedule.find(result_pfx + algorithm)).tolist()
 
     curframe = 0
     for curtime, matching in zip(range(begin, end, step), result):
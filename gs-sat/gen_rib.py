@@ -1,5 +1,6 @@
 import sys
 import os
+import schedule
 class RouteModel:
     def __init__(self, P, Q, F) -> None:
         self.P = P
@@ -62,7 +63,7 @@ if __name__ == "__main__":
         print("Error: invalid input file!")
         exit(0)
 
-    task_name = input_filename.replace(".txt", "")
+    task_name = os.path.splitext(input_filename)[0]
     output_dir = task_name
     if not os.path.exists(output_dir):
         os.mkdir(output_dir)
@@ -75,10 +76,8 @@ if __name__ == "__main__":
     for _ in range(P * Q):
         fwd_matrix.append([-1] * gs_num)
 
-    fin = open(input_filename)
-    for idx, line in enumerate(fin.readlines()):
+    for idx, feeders in enumerate(schedule.load(input_filename).tolist()):
         output_filename = os.path.join(output_dir, str(idx)) + ".txt"
-        feeders = [int(sat_id) for sat_id in line.split(' ')]
         fout = open(output_filename, "w")
         print(output_filename)
         for cur in range(P * Q):
@@ -0,0 +1,122 @@
+import os
+import sys
+import json
+import time
+import numpy as np
+from scipy.spatial import cKDTree
+
+earth_radius = 6371.393
+G = 6.67 * 1e-11
+M = 5.965 * 1e24
+
+def load_stations(gs_file, gs_num):
+    stations = []
+    with open(gs_file) as f:
+        for line in f.readlines():
+            line = line.strip()
+            if line:
+                lat, lon = line.replace(',', ' ').split()[:2]
+                stations.append([float(lat), float(lon)])
+    return np.radians(np.array(stations[:gs_num]))
+
+def unit_vectors(lat, lon):
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+class WalkerModel:
+    def __init__(self, constellation, relative_spacing=1):
+        altitude, inclination, self.Q, self.P = constellation
+        self.a = np.radians(inclination)
+        self.F = relative_spacing
+        self.radius = earth_radius + altitude
+        self.We = 2 * np.pi / (24 * 60 * 60)
+        self.Ws = np.sqrt(G * M / np.power(self.radius * 1e3, 3))
+        plane, slot = np.divmod(np.arange(self.P * self.Q), self.Q)
+        self.phase = 2 * np.pi / self.Q * slot + 2 * np.pi * self.F / self.Q / self.P * plane
+        self.raan = 2 * np.pi / self.P * plane
+
+    def size(self):
+        return self.P * self.Q
+
+    def positions(self, t):
+        u = self.Ws * t + self.phase
+        lat = np.arcsin(np.sin(self.a) * np.sin(u))
+        lon = self.raan - self.We * t + np.arctan2(np.cos(self.a) * np.sin(u), np.cos(u))
+        return unit_vectors(lat, lon)
+
+def visibility(model, gs_lat, gs_lon, gs_tree, t, min_elevation):
+    sat_unit = model.positions(t)
+    elevation = np.radians(min_elevation)
+    max_angle = np.arccos(earth_radius / model.radius * np.cos(elevation)) - elevation
+    pairs = gs_tree.sparse_distance_matrix(cKDTree(sat_unit), 2 * np.sin(max_angle / 2), output_type='ndarray')
+    gs_id, sat_id = pairs['i'].astype(np.int64), pairs['j'].astype(np.int64)
+
+    up = unit_vectors(gs_lat, gs_lon)[gs_id]
+    v = sat_unit[sat_id] * model.radius - up * earth_radius
+    dist = np.linalg.norm(v, axis=1)
+    east = np.stack([-np.sin(gs_lon), np.cos(gs_lon), np.zeros_like(gs_lon)], axis=-1)[gs_id]
+    north = np.stack([-np.sin(gs_lat) * np.cos(gs_lon), -np.sin(gs_lat) * np.sin(gs_lon), np.cos(gs_lat)], axis=-1)[gs_id]
+    pitch = np.degrees(np.arcsin(np.einsum('ij,ij->i', v, up) / dist))
+    yaw = np.degrees(np.arctan2(np.einsum('ij,ij->i', v, east), np.einsum('ij,ij->i', v, north))) % 360
+
+    mask = pitch >= min_elevation
+    order = np.lexsort((sat_id[mask], gs_id[mask]))
+    return np.stack([gs_id[mask], sat_id[mask], pitch[mask], yaw[mask], dist[mask]], axis=1)[order]
+
+packed_columns = [("gs_id", np.int16), ("sat_id", np.int32), ("pitch", np.float32), ("yaw", np.float32), ("dist", np.float32)]
+
+def finish_packed(data_dir, num_rows):
+    for name, dtype in packed_columns:
+        raw_path = os.path.join(data_dir, name + ".bin")
+        with open(os.path.join(data_dir, name + ".npy"), "wb") as fout, open(raw_path, "rb") as fin:
+            header = {"descr": np.lib.format.dtype_to_descr(np.dtype(dtype)), "fortran_order": False, "shape": (num_rows,)}
+            np.lib.format.write_array_header_1_0(fout, header)
+            while True:
+                chunk = fin.read(1 << 24)
+                if not chunk:
+                    break
+                fout.write(chunk)
+        os.remove(raw_path)
+
+def generate(config, data_format="text"):
+    begin, end, step = config["begin"], config["end"], config["step"]
+    model = WalkerModel(config["constellation"], config.get("relative_spacing", 1))
+    assert model.size() == config["sat_num"], "sat_num does not match the constellation"
+    gs_latlon = load_stations(config["gs_file"], config["gs_num"])
+    gs_lat, gs_lon = gs_latlon[:, 0], gs_latlon[:, 1]
+    gs_tree = cKDTree(unit_vectors(gs_lat, gs_lon))
+    min_elevation = config.get("min_elevation", 25)
+    data_dir = config["data_dir"]
+    if not os.path.exists(data_dir):
+        os.makedirs(data_dir)
+
+    if data_format != "text":
+        raw_files = [open(os.path.join(data_dir, name + ".bin"), "wb") for name, _ in packed_columns]
+    offsets = [0]
+    for curtime in range(begin, end, step):
+        gs_sat_vis = visibility(model, gs_lat, gs_lon, gs_tree, curtime, min_elevation)
+        if data_format == "text":
+            np.savetxt(os.path.join(data_dir, "{}.txt".format(curtime)), gs_sat_vis, fmt="%d %d %.4f %.4f %.4f")
+        else:
+            for f, (_, dtype), column in zip(raw_files, packed_columns, gs_sat_vis.T):
+                f.write(column.astype(dtype).tobytes())
+            offsets.append(offsets[-1] + len(gs_sat_vis))
+
+    if data_format != "text":
+        for f in raw_files:
+            f.close()
+        finish_packed(data_dir, offsets[-1])
+        np.save(os.path.join(data_dir, "times.npy"), np.arange(begin, end, step))
+        np.save(os.path.join(data_dir, "offsets.npy"), np.array(offsets, dtype=np.int64))
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Error: please specify configuration file!")
+        exit(0)
+
+    json_f = open(sys.argv[1])
+    config = json.loads(json_f.read())
+    data_format = sys.argv[2] if len(sys.argv) > 2 else "text"
+
+    begin_time = time.time()
+    generate(config, data_format)
+    print("Elapsed time: {:.2f}s".format(time.time() - begin_time))
@@ -1,61 +1,50 @@
 import common
+import numpy as np
 
 alpha = 3
 
-def compute(gs_id, init_state, sat_used, peek_map, max_pitch_change, max_yaw_change):
-    visible_set = set(elem[1] for elem in peek_map[0][gs_id])
-    opt = (-1e9, -1, 0, 0)
-    for sat_id in visible_set:
-        if sat_used[sat_id]:
-            continue
-        gs_state = init_state
-        duration = 0
-        swcost = 0
-        for gs_map in peek_map:
-            target_state = (-1, 90, 0)
-            for elem in gs_map[gs_id]:
-                if elem[1] == sat_id:
-                    target_state = (elem[1:4])
-
-            cur_sat_id, cur_pitch_angle, cur_yaw_angle = gs_state
-            target_sat_id, target_pitch_angle, target_yaw_angle = target_state
-
-            if target_sat_id == -1:
-                break
-
-            cur_pitch_angle, cur_yaw_angle = common.tracing(target_pitch_angle, target_yaw_angle, cur_pitch_angle, cur_yaw_angle, max_pitch_change, max_yaw_change)
-            
-            flag = True
-            if cur_pitch_angle == target_pitch_angle and cur_yaw_angle == target_yaw_angle:        
-                if cur_sat_id == target_sat_id:
-                    flag = False
-                else:
-                    cur_sat_id = target_sat_id
-            else:
-                if cur_sat_id == sat_id:
-                    break
-                else:
-                    cur_sat_id = -1
-            if flag:
-                swcost += 1
-
-            duration += 1
-            gs_state = (cur_sat_id, cur_pitch_angle, cur_yaw_angle)
-        
-        reward = duration - swcost * alpha
-        if reward > opt[0]:
-            opt = (reward, sat_id, duration, duration - swcost)
-
-    return opt
+def compute(gs_id, init_state, sat_used, peek_map, max_pitch_change, max_yaw_change, alpha=alpha):
+    visible_set = set(peek_map[0][gs_id][0].tolist())
+    candidates = np.array([sat_id for sat_id in visible_set if not sat_used[sat_id]], dtype=np.int64)
+    if len(candidates) == 0:
+        return (-1e9, -1, 0, 0)
+
+    cur_sat_id, cur_pitch_angle, cur_yaw_angle = init_state
+    cur_sat = np.full(len(candidates), cur_sat_id, dtype=np.int64)
+    cur_pitch = np.full(len(candidates), cur_pitch_angle, dtype=float)
+    cur_yaw = np.full(len(candidates), cur_yaw_angle, dtype=float)
+    duration = np.zeros(len(candidates), dtype=int)
+    swcost = np.zeros(len(candidates), dtype=int)
+    active = np.arange(len(candidates))
+    for gs_map in peek_map:
+        if len(active) == 0:
+            break
+        found, idx = common.lookup(gs_map[gs_id], candidates[active])
+        active, idx = active[found], idx[found]
+        target_pitch, target_yaw = gs_map[gs_id][1][idx], gs_map[gs_id][2][idx]
+        next_pitch, next_yaw = common.tracing_array(target_pitch, target_yaw, cur_pitch[active], cur_yaw[active], max_pitch_change, max_yaw_change)
+        aligned = (next_pitch == target_pitch) & (next_yaw == target_yaw)
+        tracked = cur_sat[active] == candidates[active]
+        alive = aligned | ~tracked
+        active, aligned, tracked = active[alive], aligned[alive], tracked[alive]
+
+        swcost[active] += ~(aligned & tracked)
+        duration[active] += 1
+        cur_sat[active] = np.where(aligned, candidates[active], -1)
+        cur_pitch[active], cur_yaw[active] = next_pitch[alive], next_yaw[alive]
+
+    reward = duration - swcost * alpha
+    best = int(np.argmax(reward))
+    return (int(reward[best]), int(candidates[best]), int(duration[best]), int(duration[best] - swcost[best]))
 
 def simulate(gs_id, init_state, peek_map, sat_id, duration, max_pitch_change, max_yaw_change):
     gs_state = init_state
     for gs_map in peek_map[:duration]:
         target_state = (-1, 90, 0)
 
-        for elem in gs_map[gs_id]:
-            if elem[1] == sat_id:
-                target_state = (elem[1:4])
+        found, idx = common.lookup(gs_map[gs_id], np.array([sat_id]))
+        if found[0]:
+            target_state = (sat_id, float(gs_map[gs_id][1][idx[0]]), float(gs_map[gs_id][2][idx[0]]))
 
         cur_sat_id, cur_pitch_angle, cur_yaw_angle = gs_state
         target_sat_id, target_pitch_angle, target_yaw_angle = target_state
@@ -81,16 +70,11 @@ def run(config):
     yaw_speed, pitch_speed = config["yaw_speed"], config["pitch_speed"]
     max_pitch_change = step * pitch_speed
     max_yaw_change = step * yaw_speed
+    switch_penalty = config.get("alpha", alpha)
 
     vis_map = []
     for curtime in range(begin, end, step):
-        gs_sat_vis = common.loadData(config, curtime)
-        gs_map = []
-        for _ in range(gs_num):
-            gs_map.append([])
-        for elem in gs_sat_vis:
-            gs_map[elem[0]].append(elem)
-        vis_map.append(gs_map)
+        vis_map.append(common.splitByGs(common.loadArray(config, curtime), gs_num))
     vis_len = len(vis_map)
 
     res = []
@@ -106,7 +90,7 @@ def run(config):
                 sat_used[res[cur_idx][gs_id]] = True
         for gs_id in range(gs_num):
             if res[cur_idx][gs_id] == -1:
-                _, target_sat, duration, gain = compute(gs_id, gs_state[gs_id], sat_used, vis_map[cur_idx:], max_pitch_change, max_yaw_change)
+                _, target_sat, duration, gain = compute(gs_id, gs_state[gs_id], sat_used, vis_map[cur_idx:], max_pitch_change, max_yaw_change, switch_penalty)
                 total_gain += gain
                 gs_state[gs_id] = simulate(gs_id, gs_state[gs_id], vis_map[cur_idx:], target_sat, duration, max_pitch_change, max_yaw_change)
                 for idx in range(cur_idx, cur_idx + duration):
@@ -1,6 +1,5 @@
 import common
 import math
-import matplotlib.pyplot as plt
 import numpy as np
 
 def get_visible_set(gs_id, gs_sat_vis):
@@ -77,6 +76,7 @@ def run(config):
         last_msat = cur_msat
 
     '''
+    import matplotlib.pyplot as plt
     max_vel = 200
     hist, bin_edges = np.histogram(stats, bins = range(0, max_vel, 10))
     print(hist, bin_edges)
@@ -1,38 +1,134 @@
+import numpy as np
 import common
 
+chunk_slices = 8640
+
+def run_ends(slice_idx, gs_id, sat_id, sat_num):
+    # Last slice of the uninterrupted visibility run every row belongs to, i.e.
+    # how long a station can stay on that satellite once it has picked it.
+    # Rows come in slice order, so a stable sort on the pair keeps them so.
+    key = gs_id * sat_num + sat_id
+    order = np.argsort(key, kind="stable")
+    k, t = key[order], slice_idx[order]
+    last = np.ones(len(order), dtype=bool)
+    last[:-1] = (k[1:] != k[:-1]) | (t[1:] != t[:-1] + 1)
+    run_id = np.cumsum(last) - last
+    res = np.empty(len(order), dtype=np.int64)
+    res[order] = t[last][run_id]
+    return res
+
+def first_of(keys):
+    # Mask of the first row of every group of equal, adjacent keys
+    res = np.empty(len(keys), dtype=bool)
+    res[:1] = True
+    np.not_equal(keys[1:], keys[:-1], out=res[1:])
+    return res
+
+def nearest(slice_idx, gs_id, dist, num, gs_num):
+    # Row of the closest visible satellite of every station in every slice,
+    # the first such row on ties
+    res = np.full(num * gs_num, -1, dtype=np.int64)
+    if len(gs_id) == 0:
+        return res.reshape(num, gs_num)
+    key = slice_idx * gs_num + gs_id
+    order = np.argsort(key, kind="stable")
+    k, d = key[order], dist[order]
+    begin = np.flatnonzero(first_of(k))
+    closest = np.repeat(np.minimum.reduceat(d, begin), np.diff(np.append(begin, len(k))))
+    hit = order[d == closest]
+    k = key[hit]
+    first = first_of(k)
+    res[k[first]] = hit[first]
+    return res.reshape(num, gs_num)
+
+def greedy(gs_id, sat_id, dist):
+    # The baseline pass over the rows in visibility order: a station takes the
+    # first free satellite it sees and moves on to a closer free one further
+    # down the list, releasing the one it had
+    pick = {}
+    used = set()
+    for row, (g, sat, d) in enumerate(zip(gs_id.tolist(), sat_id.tolist(), dist.tolist())):
+        if sat in used:
+            continue
+        if g not in pick:
+            pick[g] = row
+            used.add(sat)
+        elif d < dist[pick[g]]:
+            used.discard(int(sat_id[pick[g]]))
+            pick[g] = row
+            used.add(sat)
+    return list(pick.values())
+
+def contend(rows, need, sat_used, gs_num, sat_num):
+    # Rows picked for the stations in need among the free satellites of one
+    # slice, the same as the baseline pass. Stations that share no free
+    # satellite with another one in need cannot get in each other's way and
+    # end on their closest row; only the others are replayed row by row.
+    gs_id, sat_id, dist = rows
+    need_mask = np.zeros(gs_num, dtype=bool)
+    need_mask[need] = True
+    used_mask = np.zeros(sat_num, dtype=bool)
+    used_mask[list(sat_used)] = True
+    idx = np.flatnonzero(need_mask[gs_id] & ~used_mask[sat_id])
+    gs, sat = gs_id[idx], sat_id[idx]
+
+    first_gs = np.full(sat_num, -1, dtype=np.int64)
+    first_gs[sat[::-1]] = gs[::-1]
+    shared = np.zeros(sat_num, dtype=bool)
+    shared[sat[first_gs[sat] != gs]] = True
+    contested = np.zeros(gs_num, dtype=bool)
+    contested[gs[shared[sat]]] = True
+
+    alone = idx[~contested[gs]]
+    best = nearest(np.zeros(len(alone), dtype=np.int64), gs_id[alone], dist[alone], 1, gs_num)[0]
+    res = alone[best[best >= 0]].tolist()
+    replay = idx[contested[gs]]
+    res += replay[greedy(gs_id[replay], sat_id[replay], dist[replay])].tolist()
+    return res
+
 def run(config):
-    begin, end, step = config["begin"], config["end"], config["step"]
     gs_num = config["gs_num"]
     sat_num = config["sat_num"]
+    num = len(range(config["begin"], config["end"], config["step"]))
+
+    res = np.full([num, gs_num], -1, dtype=np.int32)
+    cur = [-1] * gs_num
+    sat_used = set()
+    for lo in range(0, num, chunk_slices):
+        hi = min(num, lo + chunk_slices)
+        data, offsets = common.loadRange(config, lo, hi)
+        slice_idx = np.repeat(np.arange(hi - lo), np.diff(offsets))
+        gs_id, sat_id, dist = data[:, 0].astype(np.int64), data[:, 1].astype(np.int64), data[:, 4]
+        ends = run_ends(slice_idx, gs_id, sat_id, sat_num)
+
+        # Runs are cut at chunk borders, so the ones still going on are
+        # picked up again from the first slice of the chunk.
+        until = [-1] * gs_num
+        for g, sat, end in zip(gs_id[:offsets[1]].tolist(), sat_id[:offsets[1]].tolist(), ends[:offsets[1]].tolist()):
+            if cur[g] == sat:
+                until[g] = end
+
+        # A station keeps its satellite for as long as it stays visible, so
+        # the assignment only has to be revisited when some run ends or a
+        # station is left without a satellite.
+        t = 0
+        while t < hi - lo:
+            need = [g for g in range(gs_num) if until[g] < t]
+            for g in need:
+                sat_used.discard(cur[g])
+                cur[g] = -1
+            lo_row, hi_row = offsets[t], offsets[t + 1]
+            if need and hi_row > lo_row:
+                for row in contend((gs_id[lo_row: hi_row], sat_id[lo_row: hi_row], dist[lo_row: hi_row]), need, sat_used, gs_num, sat_num):
+                    g = int(gs_id[lo_row + row])
+                    cur[g], until[g] = int(sat_id[lo_row + row]), int(ends[lo_row + row])
+            sat_used.update(cur)
+            sat_used.discard(-1)
+            for g in range(gs_num):
+                if cur[g] == -1:
+                    until[g] = t
 
-    res = []
-    for curtime in range(begin, end, step):
-        gs_sat_vis = common.loadData(config, curtime)
-        gs_nsat = [-1] * gs_num
-        gs_ndist = [0] * gs_num
-        sat_used = [False] * sat_num
-
-        for elem in gs_sat_vis:
-            gs_id, sat_id = elem[:2]
-            if len(res) > 0 and res[-1][gs_id] == sat_id:
-                gs_nsat[gs_id] = sat_id
-                sat_used[sat_id] = True
-
-        for elem in gs_sat_vis:
-            gs_id, sat_id = elem[:2]
-            cur_dist = elem[4]
-            if sat_used[sat_id]:
-                continue
-        
-            if gs_nsat[gs_id] == -1:
-                gs_nsat[gs_id] = sat_id
-                gs_ndist[gs_id] = cur_dist
-                sat_used[sat_id] = True
-            else:
-                if cur_dist < gs_ndist[gs_id]:
-                    sat_used[gs_nsat[gs_id]] = False
-                    gs_nsat[gs_id] = sat_id
-                    gs_ndist[gs_id] = cur_dist
-                    sat_used[sat_id] = True
-        res.append(gs_nsat)
-    return res
\ No newline at end of file
+            nxt = min(min(until) + 1, hi - lo)
+            res[lo + t: lo + nxt] = cur
+            t = nxt
+    return res
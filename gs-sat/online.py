@@ -0,0 +1,202 @@
+import sys
+import json
+import time
+import numpy as np
+import common
+import gs_state_aware_matching
+import min_distance
+
+class OnlineScheduler:
+    default_lookahead = 0
+
+    def __init__(self, config, lookahead=None):
+        self.config = config
+        self.gs_num = config["gs_num"]
+        self.sat_num = config["sat_num"]
+        # Schedulers without lookahead only ever look at the current slice
+        self.lookahead = self.default_lookahead if lookahead is None or self.default_lookahead == 0 else lookahead
+        self.reset()
+
+    def reset(self):
+        self.window = []
+        self.last = [-1] * self.gs_num
+
+    def prepare(self, vis_slice):
+        return vis_slice
+
+    def advance(self, vis_slice, lookahead):
+        # Consecutive steps share all but one slice of their windows, so only
+        # the slices that were not seen yet are prepared.
+        if self.window:
+            self.window.pop(0)
+        slices = [vis_slice] + list(lookahead[:self.lookahead])
+        for vis in slices[len(self.window):]:
+            self.window.append(self.prepare(vis))
+        del self.window[len(slices):]
+
+    def step(self, vis_slice, lookahead=()):
+        self.advance(vis_slice, lookahead)
+        self.last = self.decide()
+        return self.last
+
+    def state(self):
+        # Everything besides the visibility window that later decisions depend on
+        return tuple(self.last)
+
+class MinDistanceScheduler(OnlineScheduler):
+    def decide(self):
+        gs_sat_vis = self.window[0]
+        gs_id, sat_id = gs_sat_vis[:, 0].astype(np.int64), gs_sat_vis[:, 1].astype(np.int64)
+        gs_nsat = [-1] * self.gs_num
+        for g, sat in zip(gs_id.tolist(), sat_id.tolist()):
+            if self.last[g] == sat:
+                gs_nsat[g] = sat
+
+        need = [g for g in range(self.gs_num) if gs_nsat[g] == -1]
+        sat_used = set(gs_nsat)
+        sat_used.discard(-1)
+        for row in min_distance.contend((gs_id, sat_id, gs_sat_vis[:, 4]), need, sat_used, self.gs_num, self.sat_num):
+            gs_nsat[gs_id[row]] = int(sat_id[row])
+        return gs_nsat
+
+class MaxVisibleTimeScheduler(OnlineScheduler):
+    default_lookahead = 360
+
+    def prepare(self, vis_slice):
+        return [set(gs_vis[0].tolist()) for gs_vis in common.splitByGs(vis_slice, self.gs_num)]
+
+    def find(self, gs_id, sat_used):
+        candidates = set(sat_id for sat_id in self.window[0][gs_id] if not sat_used[sat_id])
+        if len(candidates) == 0:
+            return -1
+
+        res = next(iter(candidates))
+        for visible_sets in self.window[1:]:
+            candidates.intersection_update(visible_sets[gs_id])
+            if len(candidates) == 0:
+                break
+            res = next(iter(candidates))
+        return res
+
+    def decide(self):
+        cur_msat = [-1] * self.gs_num
+        sat_used = [False] * self.sat_num
+        for gs_id in range(self.gs_num):
+            if self.last[gs_id] in self.window[0][gs_id]:
+                cur_msat[gs_id] = self.last[gs_id]
+                sat_used[self.last[gs_id]] = True
+
+        for gs_id in range(self.gs_num):
+            if cur_msat[gs_id] == -1:
+                target = self.find(gs_id, sat_used)
+                if target == -1:
+                    continue
+                cur_msat[gs_id] = target
+                sat_used[target] = True
+        return cur_msat
+
+class MaxMatchingScheduler(OnlineScheduler):
+    def decide(self):
+        gs_sat_vis = self.window[0]
+        matching = np.full(self.gs_num, -1, dtype=np.int64)
+        if len(gs_sat_vis) == 0:
+            return matching.tolist()
+        # Only visible satellites can be matched, so the assignment is solved
+        # over those columns instead of the whole constellation.
+        sat_ids, col_idx = np.unique(gs_sat_vis[:, 1].astype(np.int64), return_inverse=True)
+        cost = np.zeros([self.gs_num, len(sat_ids)], dtype=int)
+        cost[gs_sat_vis[:, 0].astype(np.int64), col_idx] = -1
+        # SciPy is only loaded by the schedulers that solve assignments
+        from scipy.optimize import linear_sum_assignment
+        rows, cols = linear_sum_assignment(cost)
+        matched = cost[rows, cols] < 0
+        matching[rows[matched]] = sat_ids[cols[matched]]
+        return matching.tolist()
+
+class GsStateAwareScheduler(OnlineScheduler):
+    default_lookahead = 360
+
+    def reset(self):
+        OnlineScheduler.reset(self)
+        step = self.config["step"]
+        self.max_pitch_change = step * self.config["pitch_speed"]
+        self.max_yaw_change = step * self.config["yaw_speed"]
+        self.alpha = self.config.get("alpha", gs_state_aware_matching.alpha)
+        self.gs_state = [(-1, 90, 0)] * self.gs_num
+        self.committed = [[-1, 0] for _ in range(self.gs_num)]
+
+    def prepare(self, vis_slice):
+        return common.splitByGs(vis_slice, self.gs_num)
+
+    def decide(self):
+        res = [-1] * self.gs_num
+        sat_used = [False] * self.sat_num
+        for gs_id in range(self.gs_num):
+            target_sat, remaining = self.committed[gs_id]
+            if remaining > 0:
+                res[gs_id] = target_sat
+                sat_used[target_sat] = True
+
+        for gs_id in range(self.gs_num):
+            if self.committed[gs_id][1] > 0:
+                continue
+            _, target_sat, duration, _ = gs_state_aware_matching.compute(gs_id, self.gs_state[gs_id], sat_used, self.window, self.max_pitch_change, self.max_yaw_change, self.alpha)
+            self.gs_state[gs_id] = gs_state_aware_matching.simulate(gs_id, self.gs_state[gs_id], self.window, target_sat, duration, self.max_pitch_change, self.max_yaw_change)
+            self.committed[gs_id] = [target_sat, duration]
+            if duration > 0:
+                res[gs_id] = target_sat
+            sat_used[target_sat] = True
+
+        for commit in self.committed:
+            if commit[1] > 0:
+                commit[1] -= 1
+        return res
+
+    def state(self):
+        return (tuple(self.gs_state), tuple(tuple(commit) for commit in self.committed))
+
+schedulers = {
+    "min_distance": MinDistanceScheduler,
+    "max_visible_time": MaxVisibleTimeScheduler,
+    "max_matching": MaxMatchingScheduler,
+    "gs_state_aware_matching": GsStateAwareScheduler
+}
+
+def replay(config, algo, lookahead=None):
+    begin, end, step = config["begin"], config["end"], config["step"]
+    slices = [common.loadArray(config, curtime) for curtime in range(begin, end, step)]
+    scheduler = schedulers[algo](config, lookahead)
+
+    res = []
+    latency = []
+    for idx, vis_slice in enumerate(slices):
+        future = slices[idx + 1: idx + 1 + scheduler.lookahead]
+        step_begin = time.perf_counter()
+        matching = scheduler.step(vis_slice, future)
+        latency.append(time.perf_counter() - step_begin)
+        res.append(list(matching))
+    return res, np.array(latency)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python online.py <config> <algorithm> [lookahead slices]")
+        exit(0)
+
+    json_f = open(sys.argv[1])
+    config = json.loads(json_f.read())
+    algo = sys.argv[2]
+    if algo not in schedulers:
+        print("Error: invalid algorithm name!")
+        exit(0)
+    lookahead = int(sys.argv[3]) if len(sys.argv) > 3 else config.get("lookahead")
+
+    res, latency = replay(config, algo, lookahead)
+    # The first step fills the whole lookahead window, so it is reported separately
+    print("Warm-up step: {:.3f}ms".format(latency[0] * 1000))
+    latency = latency[1:] if len(latency) > 1 else latency
+    p50, p99 = np.percentile(latency, [50, 99]) * 1000
+    print("Decision latency: p50 {:.3f}ms, p99 {:.3f}ms, max {:.3f}ms over {} steps".format(p50, p99, latency.max() * 1000, len(latency)))
+    switch_freq, resource_usage, breakdown_rate = common.evalVariants(config, res, [(config["yaw_speed"], config["pitch_speed"])])[0]
+    print("Average switch frequency: {:.3f}/h".format(switch_freq))
+    print("Average feeder resource usage: {:.2%}".format(resource_usage))
+    print("Average breakdown rate: {:.2%}".format(breakdown_rate))
@@ -0,0 +1,74 @@
+import io
+import sys
+import json
+import copy
+import time
+import itertools
+import contextlib
+import multiprocessing
+import common
+import registry
+
+def grid(params):
+    names = sorted(params.keys())
+    for values in itertools.product(*[params[name] for name in names]):
+        yield dict(zip(names, values))
+
+def points(overrides):
+    res = []
+    for algo, params in overrides["algorithms"].items():
+        for point in grid(params):
+            res.append((algo, point))
+    return res
+
+def run_point(args):
+    config, algo, params, speeds = args
+    config = copy.deepcopy(config)
+    config.update(params)
+    if algo == "dp_scheduler":
+        config["processor_num"] = 1
+    module = registry.load(algo)
+    begin_time = time.time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        res = module.run(config)
+    elapsed = time.time() - begin_time
+    rows = []
+    for (yaw_speed, pitch_speed), stats in zip(speeds, common.evalVariants(config, res, speeds)):
+        rows.append([algo, json.dumps(params, sort_keys=True), config["yaw_speed"], config["pitch_speed"], yaw_speed, pitch_speed] + list(stats) + [elapsed])
+    return rows
+
+def sweep(config, overrides, workers=None):
+    speeds = [tuple(speed) for speed in overrides.get("speeds", [[config["yaw_speed"], config["pitch_speed"]]])]
+    common.preload(config)
+    task_list = [(config, algo, params, speeds) for algo, params in points(overrides)]
+    # Workers are forked after preload, so they share the loaded slices copy-on-write
+    with multiprocessing.get_context("fork").Pool(workers or max(1, multiprocessing.cpu_count() - 1)) as pool:
+        results = pool.map(run_point, task_list, chunksize=1)
+    return [row for rows in results for row in rows]
+
+def write(rows, output_file):
+    fout = open(output_file, "w")
+    fout.write("algorithm,params,yaw_speed,pitch_speed,eval_yaw_speed,eval_pitch_speed,switch_freq,resource_usage,breakdown_rate,elapsed\n")
+    for row in rows:
+        algo, params = row[:2]
+        fout.write('{},"{}",'.format(algo, params.replace('"', '""')))
+        fout.write(",".join([str(v) for v in row[2:6]] + ["{:.6f}".format(v) for v in row[6:]]) + "\n")
+    fout.close()
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python param_sweep.py <config> <sweep config> [output file] [workers]")
+        exit(0)
+
+    json_f = open(sys.argv[1])
+    config = json.loads(json_f.read())
+    json_f = open(sys.argv[2])
+    sweep_config = json.loads(json_f.read())
+    output_file = sys.argv[3] if len(sys.argv) > 3 else "{} - sweep.csv".format(config["task"])
+    workers = int(sys.argv[4]) if len(sys.argv) > 4 else None
+
+    begin_time = time.time()
+    rows = sweep(config, sweep_config, workers)
+    write(rows, output_file)
+    print("{} parameter points, {} rows written to {}".format(len(points(sweep_config)), len(rows), output_file))
+    print("Elapsed time: {:.2f}s".format(time.time() - begin_time))
@@ -0,0 +1,111 @@
+import os
+import sys
+import io
+import json
+import time
+import pstats
+import cProfile
+import functools
+import contextlib
+
+mode = os.environ.get("GS_SAT_PROFILE", "")
+enabled = mode != ""
+phases = {}
+counters = {}
+profile = None
+
+def count(name, n=1):
+    counters[name] = counters.get(name, 0) + n
+
+def record(name, elapsed):
+    total, calls = phases.get(name, (0.0, 0))
+    phases[name] = (total + elapsed, calls + 1)
+
+@contextlib.contextmanager
+def timed(name):
+    begin_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - begin_time)
+
+def phase(name):
+    if not enabled:
+        return contextlib.nullcontext()
+    return timed(name)
+
+def wrap(module, attr, counter, phase_name=None):
+    func = getattr(module, attr)
+    if getattr(func, "profiled", False):
+        return
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        counters[counter] = counters.get(counter, 0) + 1
+        if phase_name is None:
+            return func(*args, **kwargs)
+        with timed(phase_name):
+            return func(*args, **kwargs)
+
+    wrapper.profiled = True
+    setattr(module, attr, wrapper)
+
+def counted_call(args):
+    func, task = args
+    before = dict(counters)
+    res = func(task)
+    return res, {key: value - before.get(key, 0) for key, value in counters.items() if value != before.get(key, 0)}
+
+def pool_map(pool, func, tasks):
+    # Without a pool the wrapped counters already tick in this process, so
+    # merging deltas would count every call twice
+    if pool is None:
+        return [func(task) for task in tasks]
+    if not enabled:
+        return pool.map(func, tasks)
+    with timed("pool dispatch"):
+        results = pool.map(counted_call, [(func, task) for task in tasks])
+    for _, delta in results:
+        for key, value in delta.items():
+            count(key, value)
+    return [res for res, _ in results]
+
+def instrument(module):
+    # Schedulers are imported on demand, so their hooks are installed once
+    # they are loaded
+    if enabled and hasattr(module, "linear_sum_assignment"):
+        wrap(module, "linear_sum_assignment", "assignments solved", "linear_sum_assignment")
+
+def enable(profile_mode="1"):
+    global mode, enabled, profile
+    import common
+    mode, enabled = profile_mode, True
+    wrap(common, "loadArray", "loadData calls", "loadData")
+    wrap(common, "tracing", "tracing calls")
+    wrap(common, "tracing_array", "vectorized tracing calls")
+    for name in ["max_matching", "dp_scheduler"]:
+        if name in sys.modules:
+            instrument(sys.modules[name])
+    if mode == "cprofile":
+        profile = cProfile.Profile()
+        profile.enable()
+
+def dump(config, algo):
+    report = {
+        "task": config["task"],
+        "algorithm": algo,
+        "phases": {name: {"time": total, "calls": calls} for name, (total, calls) in phases.items()},
+        "counters": counters
+    }
+    output_name = "[Profile] {} - {}".format(config["task"], algo)
+    if profile is not None:
+        profile.disable()
+        profile.dump_stats(os.path.join(config["output_dir"], output_name + ".prof"))
+        stream = io.StringIO()
+        pstats.Stats(profile, stream=stream).sort_stats("cumulative").print_stats(30)
+        report["cprofile"] = stream.getvalue().split("\n")
+
+    output_file = os.path.join(config["output_dir"], output_name + ".json")
+    with open(output_file, "w") as f:
+        json.dump(report, f, indent=1)
+    return output_file
@@ -0,0 +1,38 @@
+import os
+import re
+import importlib
+
+# Any module next to this one that defines run(config) is a scheduler. They are
+# found by scanning the sources, so listing them does not import anything.
+package_dir = os.path.dirname(os.path.abspath(__file__))
+entry_point = re.compile(r"^def run\(config\):", re.MULTILINE)
+registered = {}
+discovered = None
+
+def discover():
+    global discovered
+    if discovered is None:
+        discovered = {}
+        for file in sorted(os.listdir(package_dir)):
+            if not file.endswith(".py"):
+                continue
+            with open(os.path.join(package_dir, file)) as f:
+                if entry_point.search(f.read()):
+                    discovered[file[:-3]] = file[:-3]
+    return discovered
+
+def register(name, module_name):
+    # Schedulers living elsewhere on the import path
+    registered[name] = module_name
+
+def names():
+    return sorted(set(discover()) | set(registered))
+
+def moduleName(name):
+    module_name = registered.get(name, discover().get(name))
+    if module_name is None:
+        raise KeyError(name)
+    return module_name
+
+def load(name):
+    return importlib.import_module(moduleName(name))
@@ -0,0 +1,99 @@
+import os
+import json
+import hashlib
+import importlib.util
+import numpy as np
+import registry
+
+cache_dir = os.environ.get("GS_SAT_CACHE", "cache")
+max_bytes = 2 << 30
+ignored_keys = ["task", "output_dir", "mode", "cache_dir", "processor_num"]
+code_hashes = {}
+
+def code_hash(module_name):
+    if module_name not in code_hashes:
+        with open(importlib.util.find_spec(module_name).origin, "rb") as f:
+            code_hashes[module_name] = hashlib.sha256(f.read()).hexdigest()
+    return code_hashes[module_name]
+
+def manifest(config):
+    data_dir = config["data_dir"]
+    begin, end, step = config["begin"], config["end"], config["step"]
+    if os.path.exists(os.path.join(data_dir, "offsets.npy")):
+        files = ["times.npy", "offsets.npy", "gs_id.npy", "sat_id.npy", "pitch.npy", "yaw.npy", "dist.npy"]
+    else:
+        files = ["{}.txt".format(curtime) for curtime in range(begin, end, step)]
+    res = []
+    for file in files:
+        st = os.stat(os.path.join(data_dir, file))
+        res.append([file, st.st_size, st.st_mtime_ns])
+    return res
+
+def digest(*parts):
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(json.dumps(part, sort_keys=True).encode())
+    return h.hexdigest()
+
+def settings(config):
+    return {key: value for key, value in config.items() if key not in ignored_keys}
+
+def scheduleKey(config, algo):
+    return digest("schedule", settings(config), manifest(config), algo, code_hash("common"), code_hash(registry.moduleName(algo)))
+
+def evalKey(config, res):
+    schedule = hashlib.sha256(np.asarray(res, dtype=np.int32).tobytes()).hexdigest()
+    return digest("eval", settings(config), manifest(config), schedule, code_hash("common"))
+
+def path(config, key, ext):
+    return os.path.join(config.get("cache_dir", cache_dir), key[:2], key + ext)
+
+def touch(file_path):
+    os.utime(file_path)
+
+def store(file_path, write):
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    tmp_path = file_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, file_path)
+
+def evict(config):
+    root = config.get("cache_dir", cache_dir)
+    entries = []
+    for dir_path, _, files in os.walk(root):
+        for file in files:
+            st = os.stat(os.path.join(dir_path, file))
+            entries.append((st.st_mtime, st.st_size, os.path.join(dir_path, file)))
+    total = sum(size for _, size, _ in entries)
+    limit = config.get("cache_size", max_bytes)
+    for _, size, file_path in sorted(entries):
+        if total <= limit:
+            break
+        os.remove(file_path)
+        total -= size
+
+def getSchedule(config, algo):
+    file_path = path(config, scheduleKey(config, algo), ".npy")
+    if not os.path.exists(file_path):
+        return None
+    touch(file_path)
+    return np.load(file_path).tolist()
+
+def putSchedule(config, algo, res):
+    file_path = path(config, scheduleKey(config, algo), ".npy")
+    store(file_path, lambda f: np.save(f, np.asarray(res, dtype=np.int32)))
+    evict(config)
+
+def getEval(config, res):
+    file_path = path(config, evalKey(config, res), ".json")
+    if not os.path.exists(file_path):
+        return None
+    touch(file_path)
+    with open(file_path) as f:
+        return tuple(json.load(f))
+
+def putEval(config, res, metrics):
+    file_path = path(config, evalKey(config, res), ".json")
+    store(file_path, lambda f: f.write(json.dumps(list(metrics)).encode()))
+    evict(config)
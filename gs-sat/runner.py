@@ -1,14 +1,24 @@
 import sys
 import json
-import max_visible_time
-import min_distance
-import max_matching
-import dp_scheduler
 import common
 import time
-import gs_state_aware_matching
+import registry
+import profiler
+import result_cache
+import schedule
+import os
 
 if __name__ == '__main__':
+    for arg in sys.argv[1:]:
+        if arg.startswith("--profile"):
+            profiler.mode = arg.split("=")[1] if "=" in arg else "1"
+            sys.argv.remove(arg)
+    use_cache = "--no-cache" not in sys.argv
+    if not use_cache:
+        sys.argv.remove("--no-cache")
+    if profiler.mode:
+        profiler.enable(profiler.mode)
+
     if len(sys.argv) < 2:
         print("Error: please specify configuration file!")
         exit(0)
@@ -22,23 +32,39 @@ if __name__ == '__main__':
 
     begin_time = time.time()
     algo = sys.argv[2]
-    if algo == "max_visible_time":
-        res = max_visible_time.run(config)
-    elif algo == "min_distance":
-        res = min_distance.run(config)
-    elif algo == "max_matching":
-        res = max_matching.run(config)
-    elif algo == "dp_scheduler":
-        res = dp_scheduler.run(config)
-    elif algo == "gs_state_aware_matching":
-        res = gs_state_aware_matching.run(config)
-    else:
+    if algo not in registry.names():
         print("Error: invalid algorithm name!")
         exit(0)
 
-    common.output(config, res, algo)
-    common.eval(config, res, algo)
+    res = result_cache.getSchedule(config, algo) if use_cache else None
+    if res is not None:
+        print("Loaded cached schedule")
+    else:
+        module = registry.load(algo)
+        profiler.instrument(module)
+        with profiler.phase("schedule"):
+            res = module.run(config)
+        if use_cache:
+            result_cache.putSchedule(config, algo, res)
+
+    with profiler.phase("output"):
+        common.output(config, res, algo)
+
+    eval_file = schedule.find(os.path.join(config["output_dir"], schedule.fileName(config, algo, True)))
+    metrics = result_cache.getEval(config, res) if use_cache and eval_file is not None else None
+    if metrics is not None:
+        print("Average switch frequency: {:.3f}/h".format(metrics[0]))
+        print("Average feeder resource usage: {:.2%}".format(metrics[1]))
+        print("Average breakdown rate: {:.2%} (cached)".format(metrics[2]))
+    else:
+        with profiler.phase("eval"):
+            metrics = common.eval(config, res, algo)
+        if use_cache:
+            result_cache.putEval(config, res, metrics)
 
     end_time = time.time()
 
-    print("Elapsed time: {:.2f}s".format(end_time - begin_time))
\ No newline at end of file
+    print("Elapsed time: {:.2f}s".format(end_time - begin_time))
+
+    if profiler.enabled:
+        print("Profile written to", profiler.dump(config, algo))
\ No newline at end of file
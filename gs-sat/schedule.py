@@ -0,0 +1,61 @@
+import os
+import json
+import time
+import numpy as np
+
+magic = b"GSSCHED1"
+alignment = 64
+extensions = [".sched", ".txt"]
+
+def fileName(config, algo, eval=False):
+    return ("[Eval] " if eval else "") + "{} - {}".format(config["task"], algo)
+
+def write(path, result, config, algo, eval=False):
+    dtype = np.int16 if config["sat_num"] <= np.iinfo(np.int16).max else np.int32
+    arr = np.asarray(result, dtype=dtype).reshape(-1, config["gs_num"])
+    header = json.dumps({
+        "dtype": np.dtype(dtype).str,
+        "shape": list(arr.shape),
+        "algorithm": algo,
+        "eval": eval,
+        "created": time.time(),
+        "config": config
+    }).encode()
+    header += b" " * (-(len(magic) + 4 + len(header)) % alignment)
+    with open(path, "wb") as f:
+        f.write(magic)
+        f.write(np.uint32(len(header)).tobytes())
+        f.write(header)
+        f.write(arr.tobytes())
+
+def writeText(path, result):
+    fout = open(path, "w")
+    for matching in result:
+        fout.write(" ".join([str(sat_id) for sat_id in matching]))
+        fout.write("\n")
+    fout.close()
+
+def read(path):
+    with open(path, "rb") as f:
+        assert f.read(len(magic)) == magic, "not a schedule file: {}".format(path)
+        header_len = int(np.frombuffer(f.read(4), dtype=np.uint32)[0])
+        header = json.loads(f.read(header_len).decode())
+    shape = tuple(header["shape"])
+    if shape[0] == 0:
+        return header, np.zeros(shape, dtype=header["dtype"])
+    return header, np.memmap(path, dtype=header["dtype"], mode="r", offset=len(magic) + 4 + header_len, shape=shape)
+
+def readText(path):
+    with open(path) as f:
+        return np.array([[int(target) for target in line.split(' ')] for line in f.readlines()], dtype=np.int32)
+
+def load(path):
+    if path.endswith(".txt"):
+        return readText(path)
+    return read(path)[1]
+
+def find(prefix):
+    for ext in extensions:
+        if os.path.exists(prefix + ext):
+            return prefix + ext
+    return None
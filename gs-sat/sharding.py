@@ -0,0 +1,141 @@
+import sys
+import json
+import time
+import multiprocessing
+import numpy as np
+import common
+import online
+import registry
+
+# Time-sharded runs of the online schedulers. Every shard warms its scheduler
+# up over a margin of earlier slices and runs on its own. At each boundary the
+# scheduler of the previous shard then keeps stepping into the next shard
+# until its state matches the one the shard reached on its own, or up to the
+# end of the shard if it never does. Either way the stitched schedule is the
+# sequential online replay (online.replay, with the same bounded lookahead),
+# not the batch scheduler of the same name: max_visible_time and
+# gs_state_aware_matching look over the whole horizon in batch, but are
+# replaced here by their online variants with a 360-slice lookahead (or the
+# config's "lookahead"). A boundary that never converges has its whole shard
+# re-run serially in the parent, which eats into the parallel speedup.
+
+def load_slices(config, lo, hi):
+    begin, step = config["begin"], config["step"]
+    return [common.loadArray(config, begin + idx * step) for idx in range(lo, hi)]
+
+def num_slices(config):
+    return len(range(config["begin"], config["end"], config["step"]))
+
+def run_shard(args):
+    config, algo, lookahead, lo, hi, margin = args
+    scheduler = online.schedulers[algo](config, lookahead)
+    first = max(0, lo - margin)
+    slices = load_slices(config, first, min(num_slices(config), hi + scheduler.lookahead))
+
+    res = []
+    states = []
+    for idx in range(first, hi):
+        k = idx - first
+        matching = scheduler.step(slices[k], slices[k + 1: k + 1 + scheduler.lookahead])
+        if idx >= lo:
+            res.append(list(matching))
+            states.append(scheduler.state())
+    return res, states, scheduler
+
+def stitch(config, bounds, shards):
+    # Continue the previous shard's scheduler into the next shard until its
+    # state matches the one the shard reached on its own; from there on the
+    # shard's schedule is what a sequential run would have produced. A
+    # boundary that never converges re-runs the whole shard sequentially.
+    stats = []
+    for i in range(1, len(shards)):
+        scheduler = shards[i - 1][2]
+        res, states, _ = shards[i]
+        lo = bounds[i]
+        slices = load_slices(config, lo, min(num_slices(config), bounds[i + 1] + scheduler.lookahead))
+        converged = False
+        steps = 0
+        for j in range(len(res)):
+            steps += 1
+            res[j] = list(scheduler.step(slices[j], slices[j + 1: j + 1 + scheduler.lookahead]))
+            if scheduler.state() == states[j]:
+                converged = True
+                break
+        if not converged:
+            # The continuation is the sequential run of the whole shard and
+            # carries on into the next boundary
+            shards[i] = (res, states, scheduler)
+        stats.append({"boundary": lo, "reconciled_steps": steps, "converged": converged})
+    return [matching for res, _, _ in shards for matching in res], stats
+
+def run(config, algo, shard_num, lookahead=None, margin=60, workers=None):
+    n = num_slices(config)
+    bounds = [n * i // shard_num for i in range(shard_num + 1)]
+    task_list = [(config, algo, lookahead, bounds[i], bounds[i + 1], margin) for i in range(shard_num)]
+    with multiprocessing.Pool(workers or min(shard_num, multiprocessing.cpu_count())) as pool:
+        shards = pool.map(run_shard, task_list, chunksize=1)
+    return stitch(config, bounds, shards)
+
+def serial_slices(stats):
+    # Slices the parent stepped through on its own while reconciling
+    return sum(stat["reconciled_steps"] for stat in stats)
+
+def deviation(config, res, ref):
+    res, ref = np.array(res), np.array(ref)
+    speeds = [(config["yaw_speed"], config["pitch_speed"])]
+    metrics, ref_metrics = common.evalVariants(config, res, speeds)[0], common.evalVariants(config, ref, speeds)[0]
+    return {
+        "differing_assignments": float((res != ref).mean()),
+        "differing_steps": float((res != ref).any(axis=1).mean()),
+        "metrics": metrics,
+        "reference_metrics": ref_metrics
+    }
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4:
+        print("Usage: python sharding.py <config> <algorithm> <shards> [margin] [--check]")
+        exit(0)
+
+    check = "--check" in sys.argv
+    if check:
+        sys.argv.remove("--check")
+    json_f = open(sys.argv[1])
+    config = json.loads(json_f.read())
+    algo = sys.argv[2]
+    shard_num = int(sys.argv[3])
+    margin = int(sys.argv[4]) if len(sys.argv) > 4 else 60
+
+    lookahead = online.schedulers[algo](config, config.get("lookahead")).lookahead
+    if lookahead > 0:
+        print("Note: sharding runs the online {} with a {}-slice lookahead instead of the batch scheduler's full horizon".format(algo, lookahead))
+
+    begin_time = time.time()
+    res, stats = run(config, algo, shard_num, config.get("lookahead"), margin)
+    print("Sharded run: {:.2f}s".format(time.time() - begin_time))
+    for stat in stats:
+        print("Boundary at slice {}: {} after {} steps".format(stat["boundary"], "converged" if stat["converged"] else "did not converge, shard re-run", stat["reconciled_steps"]))
+    unconverged = sum(not stat["converged"] for stat in stats)
+    print("{} of {} boundaries did not converge and re-ran their shard serially".format(unconverged, len(stats)))
+    print("{} of {} slices were stepped serially in the parent".format(serial_slices(stats), len(res)))
+    # The stitched schedule comes from the online variant, so it must not
+    # replace the batch scheduler's output
+    common.output(config, res, algo + " (sharded)")
+
+    if check:
+        # The batch scheduler is the sequential reference; the online replay
+        # with the same lookahead is what reconciliation converges to, so it
+        # only shows the deviation sharding itself adds
+        references = []
+        begin_time = time.time()
+        references.append(("Sequential batch run", registry.load(algo).run(config)))
+        print("Sequential batch run: {:.2f}s".format(time.time() - begin_time))
+        begin_time = time.time()
+        references.append(("Sequential online replay", online.replay(config, algo, config.get("lookahead"))[0]))
+        print("Sequential online replay: {:.2f}s".format(time.time() - begin_time))
+
+        devs = [(name, deviation(config, res, ref)) for name, ref in references]
+        for name, dev in devs:
+            print("vs {}: differing assignments {:.4%}, differing steps {:.4%}".format(name, dev["differing_assignments"], dev["differing_steps"]))
+        print("{:<25}switch frequency {:.3f}/h, resource usage {:.2%}, breakdown rate {:.2%}".format("Sharded", *devs[0][1]["metrics"]))
+        for name, dev in devs:
+            print("{:<25}switch frequency {:.3f}/h, resource usage {:.2%}, breakdown rate {:.2%}".format(name, *dev["reference_metrics"]))
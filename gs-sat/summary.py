@@ -1,6 +1,8 @@
 import os
 import json 
 import common
+import result_cache
+import schedule
 import re
 
 load_dir = "/home/chenyuxuan/satnet/gs-sat/output"
@@ -15,17 +17,17 @@ fout = open(output_name, "w")
 fout.write("task,algorithm,switch_frequency,resource_usage,breakdown_rate\n")
 
 
+stems = []
 for file_name in file_name_list:
-    if file_name.find("[Eval]") != -1:
+    stem, ext = os.path.splitext(file_name)
+    if file_name.find("[Eval]") != -1 or file_name.find("[Profile]") != -1 or ext not in schedule.extensions:
         continue
-    task_name, algorithm = file_name.split('.')[0].split(' - ')
-    
-    fin = open(os.path.join(load_dir, file_name))
-    res = []
-    for line in fin.readlines():
-        matching = [int(target) for target in line.split(' ')]
-        res.append(matching)
-    fin.close()
+    if stem not in stems:
+        stems.append(stem)
+
+for stem in stems:
+    task_name, algorithm = stem.split(' - ')
+    res = schedule.load(schedule.find(os.path.join(load_dir, stem))).tolist()
 
     if task_name.find("Silk") != -1:
         matchObj = re.search(r'\((.*)\)', task_name)
@@ -37,7 +39,11 @@ for file_name in file_name_list:
     config = json.load(fin)
     fin.close()
 
-    switch_freq, resource_usage, breakdown_rate = common.eval(config, res, algorithm)
+    metrics = result_cache.getEval(config, res)
+    if metrics is None:
+        metrics = common.eval(config, res, algorithm)
+        result_cache.putEval(config, res, metrics)
+    switch_freq, resource_usage, breakdown_rate = metrics
     if algorithm == "max_visible_time":
         base_switch_freq = switch_freq
         base_resource_usage = resource_usage
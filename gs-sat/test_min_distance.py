@@ -0,0 +1,31 @@
+import numpy as np
+import min_distance
+import online
+
+# Station 0 sees satellite 7 first; station 1 sees it closer but also sees
+# satellite 8. The pass in visibility order leaves 7 to station 0.
+rows = [
+    [0, 7, 0, 0, 5.0],
+    [1, 7, 0, 0, 1.0],
+    [1, 8, 0, 0, 9.0],
+]
+
+def make_config(tmp_path, slices):
+    for i, vis in enumerate(slices):
+        with open(tmp_path / "{}.txt".format(i * 10), "w") as f:
+            f.write("\n".join(" ".join(str(v) for v in row) for row in vis))
+    return {"data_dir": str(tmp_path), "begin": 0, "end": 10 * len(slices), "step": 10, "gs_num": 2, "sat_num": 9}
+
+def test_contend_keeps_visibility_order():
+    data = np.array(rows)
+    picked = min_distance.contend((data[:, 0].astype(np.int64), data[:, 1].astype(np.int64), data[:, 4]), [0, 1], set(), 2, 9)
+    assert sorted(picked) == [0, 2]
+
+def test_run_gives_displaced_station_a_free_satellite(tmp_path):
+    config = make_config(tmp_path, [rows])
+    assert min_distance.run(config).tolist() == [[7, 8]]
+
+def test_online_replay_matches_batch(tmp_path):
+    config = make_config(tmp_path, [rows, rows[1:], rows])
+    res, _ = online.replay(config, "min_distance")
+    assert res == min_distance.run(config).tolist() == [[7, 8], [-1, 8], [7, 8]]
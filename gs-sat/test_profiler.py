@@ -0,0 +1,25 @@
+import multiprocessing
+import pytest
+import profiler
+
+def bump(n):
+    profiler.count("bumps", n)
+    return n * 2
+
+@pytest.fixture
+def counters(monkeypatch):
+    monkeypatch.setattr(profiler, "enabled", True)
+    monkeypatch.setattr(profiler, "counters", {})
+    monkeypatch.setattr(profiler, "phases", {})
+    return profiler
+
+def test_pool_map_counts_once_without_pool(counters):
+    assert counters.pool_map(None, bump, [1, 2, 3]) == [2, 4, 6]
+    assert counters.counters == {"bumps": 6}
+    assert "pool dispatch" not in counters.phases
+
+def test_pool_map_merges_worker_counters_once(counters):
+    with multiprocessing.get_context("fork").Pool(2) as pool:
+        assert counters.pool_map(pool, bump, [1, 2, 3]) == [2, 4, 6]
+    assert counters.counters == {"bumps": 6}
+    assert counters.phases["pool dispatch"][1] == 1
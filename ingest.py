@@ -0,0 +1,151 @@
+import os
+import sys
+import json
+import hashlib
+import numpy as np
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+default_db_dir = "results"
+index_name = "index.json"
+table_ext = ".parquet" if pq is not None else ".npz"
+
+def parseReport(file_path):
+    with open(file_path) as f:
+        lines = f.read().split("\n")
+
+    header = {}
+    body_begin = -1
+    for idx, line in enumerate(lines):
+        if line.find(":") == -1:
+            return None
+        key, value = line.split(":", 1)
+        key = key.strip()
+        header[key] = value.strip()
+        if key == "number of observers":
+            body_begin = idx + 1
+            break
+    if body_begin == -1:
+        return None
+
+    num_observers = int(header["number of observers"])
+    body = lines[body_begin: body_begin + 3 * num_observers]
+    if len(body) < 3 * num_observers or (num_observers > 0 and body[-1].find(":") == -1):
+        return None
+
+    endpoints = " ".join([line[line.find("[") + 1: line.rfind("]")] for line in body[0::3]])
+    endpoints = np.array(endpoints.replace(",", " ").split(), dtype=np.int32).reshape(-1, 2)
+    columns = {
+        "src": endpoints[:, 0],
+        "dst": endpoints[:, 1],
+        "latency": np.array([line.split(":")[1] for line in body[1::3]], dtype=np.float64),
+        "failure": np.array([line.split(":")[1] for line in body[2::3]], dtype=np.float64),
+    }
+    return header, columns
+
+def writeTable(path, columns):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if path.endswith(".parquet"):
+        table = pyarrow.table({key: pyarrow.array(value) for key, value in columns.items()})
+        pq.write_table(table, path)
+    else:
+        with open(path, "wb") as f:
+            np.savez(f, **columns)
+
+def readTable(path, columns):
+    if path.endswith(".parquet"):
+        table = pq.read_table(path, columns=list(columns))
+        return {key: table.column(key).to_numpy() for key in columns}
+    with np.load(path) as data:
+        return {key: data[key] for key in columns}
+
+def loadIndex(db_dir):
+    index_path = os.path.join(db_dir, index_name)
+    if not os.path.exists(index_path):
+        return {}
+    with open(index_path) as f:
+        return json.load(f)
+
+def saveIndex(db_dir, index):
+    index_path = os.path.join(db_dir, index_name)
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp_path, index_path)
+
+def tablePath(header, file_path):
+    # Reports of the same name and algorithm may come from different files,
+    # so the table is told apart by its source
+    source = hashlib.sha1(file_path.encode()).hexdigest()[:12]
+    return os.path.join(header["name"], "{} {}{}".format(header["algorithm"], source, table_ext))
+
+def removeTable(db_dir, entry):
+    if os.path.exists(os.path.join(db_dir, entry["table"])):
+        os.remove(os.path.join(db_dir, entry["table"]))
+
+def ingestReports(report_dir, db_dir=default_db_dir):
+    os.makedirs(db_dir, exist_ok=True)
+    index = loadIndex(db_dir)
+    updated = False
+
+    for key in list(index.keys()):
+        if not os.path.exists(key):
+            print("Dropping deleted report {}".format(key))
+            removeTable(db_dir, index.pop(key))
+            updated = True
+
+    files = os.listdir(report_dir)
+    files.sort()
+    for file in files:
+        if file.find("report") == -1 or not file.endswith(".txt"):
+            continue
+        file_path = os.path.abspath(os.path.join(report_dir, file))
+        stat = os.stat(file_path)
+        entry = index.get(file_path)
+        if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+            continue
+
+        parsed = parseReport(file_path)
+        if parsed is None:
+            print("Skipping incomplete report {}".format(file_path))
+            continue
+        header, columns = parsed
+        print("Ingesting {}".format(file_path))
+
+        if entry:
+            removeTable(db_dir, entry)
+        table = tablePath(header, file_path)
+        writeTable(os.path.join(db_dir, table), columns)
+        index[file_path] = {
+            "mtime": stat.st_mtime,
+            "size": stat.st_size,
+            "table": table,
+            "header": header
+        }
+        updated = True
+
+    if updated:
+        saveIndex(db_dir, index)
+    return index
+
+def loadRecords(db_dir, target_name, columns=("latency", "failure")):
+    records = []
+    index = loadIndex(db_dir)
+    for file in sorted(index.keys()):
+        entry = index[file]
+        if entry["header"]["name"] != target_name:
+            continue
+        record = dict(entry["header"])
+        record.update(readTable(os.path.join(db_dir, entry["table"]), columns))
+        records.append(record)
+    return records
+
+if __name__ == "__main__":
+    report_dir = sys.argv[1] if len(sys.argv) > 1 else "output"
+    db_dir = sys.argv[2] if len(sys.argv) > 2 else default_db_dir
+    index = ingestReports(report_dir, db_dir)
+    print("{} reports in {}".format(len(index), db_dir))
@@ -0,0 +1,213 @@
+import os
+import sys
+import json
+import time
+import ctypes
+import ctypes.util
+import multiprocessing
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+import outage
+
+def neighbours(config):
+    # Satellite reached through each port, the same as SpaceSimulation::move.
+    # Port 0 stays on the node itself.
+    P = config["constellation"]["num_of_orbit_planes"]
+    Q = config["constellation"]["num_of_satellites_per_plane"]
+    F = config["constellation"]["relative_spacing"]
+    x, y = np.divmod(np.arange(P * Q), Q)
+    res = np.empty((P * Q, 5), dtype=np.int64)
+    res[:, 0] = x * Q + y
+    res[:, 1] = x * Q + (y - 1) % Q
+    res[:, 2] = np.where(x == P - 1, (y + F) % Q, (x + 1) * Q + y)
+    res[:, 3] = x * Q + (y + 1) % Q
+    res[:, 4] = np.where(x == 0, (P - 1) * Q + (y - F) % Q, (x - 1) * Q + y)
+    return res
+
+def simTimes(config):
+    start_time = config.get("start_time", 0)
+    return np.arange(start_time, start_time + config["duration"], config["step_length"])
+
+def readNumbers(file_path, dtype):
+    if not os.path.exists(file_path):
+        return np.zeros(0, dtype=dtype)
+    with open(file_path) as f:
+        return np.array(f.read().split(), dtype=dtype)
+
+def portsOf(nbr, u, v):
+    # Port of u that leads to v and port of v that leads back to u
+    u_port = np.argmax(nbr[u, 1:] == v[:, None], axis=1) + 1
+    v_port = np.argmax(nbr[v, 1:] == u[:, None], axis=1) + 1
+    valid = (nbr[u, u_port] == v) & (nbr[v, v_port] == u)
+    if not valid.all():
+        raise ValueError("link {} - {} is not an ISL".format(u[~valid][0], v[~valid][0]))
+    return u_port, v_port
+
+def loadBanned(config, cur_time, nbr):
+    timeline = outage.load(config["isl_state_dir"])
+    if timeline is not None:
+        pairs = timeline.stateAt(cur_time).astype(np.int64)
+    else:
+        pairs = readNumbers(os.path.join(config["isl_state_dir"], "{}.txt".format(cur_time)), np.int64).reshape(-1, 2)
+    banned = np.zeros(nbr.shape, dtype=bool)
+    if len(pairs):
+        u_port, v_port = portsOf(nbr, pairs[:, 0], pairs[:, 1])
+        banned[pairs[:, 0], u_port] = True
+        banned[pairs[:, 1], v_port] = True
+    return banned
+
+def bannedSeries(config, times, nbr):
+    # Down ports at each of the ascending times. With an outage timeline only
+    # the changes since the previous time are applied, to the same array.
+    timeline = outage.load(config["isl_state_dir"])
+    banned, prev_time = None, None
+    for cur_time in times:
+        if timeline is None or banned is None:
+            banned = loadBanned(config, cur_time, nbr)
+        else:
+            _, u, v, down = timeline.changes(prev_time, cur_time)
+            if len(u):
+                # Only the last event of a link counts
+                _, last = np.unique((u.astype(np.int64) << 32 | v)[::-1], return_index=True)
+                last = len(u) - 1 - last
+                u, v, down = u[last].astype(np.int64), v[last].astype(np.int64), down[last]
+                u_port, v_port = portsOf(nbr, u, v)
+                banned[u, u_port] = down
+                banned[v, v_port] = down
+        prev_time = cur_time
+        yield banned
+
+def islDelayDir(config):
+    if "isl_delay_dir" in config:
+        return config["isl_delay_dir"]
+    return os.path.join(os.path.dirname(os.path.normpath(config["isl_state_dir"])), "isl-delay")
+
+def loadDelay(config, cur_time, nbr):
+    # Latency of one hop through every port in ms. isl-delay gives the
+    # propagation delay of each link; without it the delay follows from the
+    # satellite positions exactly as SpaceSimulation::calcuDelay does.
+    latency = config["ISL_latency"]
+    delay_file = os.path.join(islDelayDir(config), "{}.txt".format(cur_time))
+    if os.path.exists(delay_file):
+        delay = np.full(nbr.shape, np.nan)
+        links = readNumbers(delay_file, np.float64).reshape(-1, 5)
+        for node, port in [(0, 1), (2, 3)]:
+            delay[links[:, node].astype(np.int64), links[:, port].astype(np.int64)] = links[:, 4]
+    else:
+        pos = readNumbers(os.path.join(config["sat_position_dir"], "{}.csv".format(cur_time)), np.float64).reshape(-1, 3)
+        delay = np.linalg.norm(pos[nbr] - pos[:, None, :], axis=2) * 1000 / latency["propagation_speed"] * 1000
+    return latency["processing_delay"] + latency["propagation_delay_coef"] * delay
+
+def islGraph(nbr):
+    # Directed CSR adjacency with one entry per (node, port 1-4). The
+    # structure is fixed by the constellation, so every time slice only
+    # rewrites the weights.
+    num_nodes = len(nbr)
+    indptr = np.arange(0, 4 * num_nodes + 1, 4)
+    return csr_matrix((np.ones(4 * num_nodes), nbr[:, 1:].ravel(), indptr), shape=(num_nodes, num_nodes))
+
+def updateGraph(graph, delay, banned):
+    # Links that are down or have no delay get an infinite weight instead of
+    # being removed
+    graph.data[:] = delay[:, 1:].ravel()
+    graph.data[banned[:, 1:].ravel() | np.isnan(graph.data)] = np.inf
+
+def shortestLatency(graph, src, dst, block_size=512):
+    # Observers are grouped by source and the sources are solved in blocks,
+    # so memory stays at block_size rows of the distance matrix
+    sources, src_idx = np.unique(src, return_inverse=True)
+    res = np.empty(len(src))
+    order = np.argsort(src_idx, kind="stable")
+    bounds = np.searchsorted(src_idx[order], np.arange(0, len(sources) + block_size, block_size))
+    for i, begin in enumerate(range(0, len(sources), block_size)):
+        idx = order[bounds[i]: bounds[i + 1]]
+        dist = dijkstra(graph, indices=sources[begin: begin + block_size])
+        res[idx] = dist[src_idx[idx] - begin, dst[idx]]
+    return res
+
+def observers(config):
+    # Same pairs as the latency observers of SpaceSimulation, including the
+    # C library's rand() sequence for a given random_seed
+    num_nodes = config["constellation"]["num_of_orbit_planes"] * config["constellation"]["num_of_satellites_per_plane"]
+    num_observers = config.get("num_latency_observers", 0)
+    if num_observers == -1:
+        src, dst = np.divmod(np.arange(num_nodes * num_nodes), num_nodes)
+        return src[src != dst], dst[src != dst]
+    libc = ctypes.CDLL(ctypes.util.find_library("c"))
+    libc.srand(config["random_seed"])
+    pairs = []
+    for _ in range(num_observers):
+        u, v = 0, 0
+        while u == v:
+            u = libc.rand() % num_nodes
+            v = libc.rand() % num_nodes
+        pairs.append((u, v))
+    pairs = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+    return pairs[:, 0], pairs[:, 1]
+
+def runSlices(args):
+    config, times, src, dst = args
+    nbr = neighbours(config)
+    graph = islGraph(nbr)
+    latency_sum = np.zeros(len(src))
+    reachable = np.zeros(len(src), dtype=np.int64)
+    for cur_time, banned in zip(times, bannedSeries(config, times, nbr)):
+        updateGraph(graph, loadDelay(config, cur_time, nbr), banned)
+        latency = shortestLatency(graph, src, dst)
+        ok = np.isfinite(latency)
+        latency_sum[ok] += latency[ok]
+        reachable += ok
+    return latency_sum, reachable
+
+def oracle(config, workers=None, chunk_size=16):
+    # Per observer average optimal latency over the slices in which the
+    # destination is reachable, and the fraction of slices in which it is not
+    src, dst = observers(config)
+    times = simTimes(config)
+    task_list = [(config, times[i: i + chunk_size], src, dst) for i in range(0, len(times), chunk_size)]
+    latency_sum = np.zeros(len(src))
+    reachable = np.zeros(len(src), dtype=np.int64)
+    with multiprocessing.Pool(workers or multiprocessing.cpu_count()) as pool:
+        for chunk_sum, chunk_reachable in pool.imap_unordered(runSlices, task_list):
+            latency_sum += chunk_sum
+            reachable += chunk_reachable
+    latency = np.where(reachable > 0, latency_sum / np.maximum(reachable, 1), 0)
+    failure = 1 - reachable / len(times) if len(times) else np.zeros(len(src))
+    return src, dst, latency, failure
+
+def writeReport(config, src, dst, latency, failure, elapsed):
+    # Same layout as SpaceSimulation::report, so ingest.py picks it up
+    # like any other algorithm
+    report_path = os.path.join(config["report_dir"], "report [{}] Oracle.txt".format(config["name"]))
+    fout = open(report_path, "w")
+    fout.write("name: {}\n".format(config["name"]))
+    fout.write("algorithm: Oracle\n")
+    fout.write("node type: Oracle\n")
+    fout.write("simulation time: {}\n".format(config.get("start_time", 0) + config["duration"]))
+    fout.write("real-world time: {:f}\n".format(elapsed))
+    fout.write("estimated time of arrival: {:f}\n".format(0))
+    fout.write("compute time: {:f}\n".format(0))
+    fout.write("update entry: {:f}\n".format(0))
+    fout.write("number of observers: {}\n".format(len(src)))
+    for i in range(len(src)):
+        fout.write("route path [{}, {}]\n\tlatency: {:f}\n\tfailure rate: {:f}\n".format(src[i], dst[i], latency[i], failure[i]))
+    fout.close()
+    return report_path
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python isl.py <config> [workers]")
+        exit(0)
+
+    json_f = open(sys.argv[1])
+    config = json.loads(json_f.read())
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    begin_time = time.time()
+    src, dst, latency, failure = oracle(config, workers)
+    elapsed = time.time() - begin_time
+    print("Average latency: {:.4f}".format(latency.mean() if len(latency) else 0))
+    print("Average failure rate: {:.4%}".format(failure.mean() if len(failure) else 0))
+    print("Report written to", writeReport(config, src, dst, latency, failure, elapsed))
+    print("Elapsed time: {:.2f}s".format(elapsed))
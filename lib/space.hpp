@@ -85,6 +85,8 @@ private:
     std::vector<double> sat_vel;
 
     char report_filename[100];
+    std::string progress_filename;
+    long long progress_seq;
 
     double run_start;
     int cur_time;
@@ -220,7 +222,7 @@ private:
         }
     }
 
-    void report() {
+    void report(bool finished = false) {
         double past_time = cur_time - start_time + 1;
         double rw_time = (clock() -  run_start) / CLOCKS_PER_SEC;
         double eta = rw_time / past_time * std::max(duration - past_time, 0.0);
@@ -230,7 +232,8 @@ private:
 
 
         auto open_path = report_dir + "/" + std::string(report_filename);
-        auto fout = fopen(open_path.c_str(), "w");
+        auto tmp_path = open_path + ".tmp";
+        auto fout = fopen(tmp_path.c_str(), "w");
         fprintf(fout, "name: %s\n", name.c_str());
         fprintf(fout, "algorithm: %s\n", algorithm.c_str());
         fprintf(fout, "node type: %s\n", typeid(T).name());
@@ -248,6 +251,59 @@ private:
             fprintf(fout, "route path [%d, %d]\n\tlatency: %f\n\tfailure rate: %f\n", src, dst, latency, failure_rate);
         }
         fclose(fout);
+        rename(tmp_path.c_str(), open_path.c_str());
+
+        report_progress(rw_time, eta, finished);
+    }
+
+    void reset_progress() {
+        progress_seq = 0;
+        auto jsonl_path = report_dir + "/" + progress_filename + ".jsonl";
+        auto fprog = fopen(jsonl_path.c_str(), "w");
+        fclose(fprog);
+        auto snapshot_path = report_dir + "/" + progress_filename + ".bin";
+        auto fsnap = fopen(snapshot_path.c_str(), "wb");
+        int header[3] = {1, num_observers, 0};
+        fwrite("SNPS", 1, 4, fsnap);
+        fwrite(header, sizeof(int), 3, fsnap);
+        fclose(fsnap);
+    }
+
+    void report_progress(double rw_time, double eta, bool finished) {
+        long long seq = ++progress_seq;
+        long long sim_time = cur_time;
+        std::vector<double> values(2 * num_observers);
+        for(int i = 0; i < num_observers; i++) {
+            values[i] = latency_results[i].getResult();
+            values[num_observers + i] = failure_rates[i].getResult();
+        }
+        long slot_size = sizeof(long long) * 3 + sizeof(double) * values.size();
+        auto snapshot_path = report_dir + "/" + progress_filename + ".bin";
+        auto fsnap = fopen(snapshot_path.c_str(), "r+b");
+        fseek(fsnap, 16 + (seq % 2) * slot_size, SEEK_SET);
+        fwrite(&seq, sizeof(long long), 1, fsnap);
+        fwrite(&sim_time, sizeof(long long), 1, fsnap);
+        fwrite(values.data(), sizeof(double), values.size(), fsnap);
+        fwrite(&seq, sizeof(long long), 1, fsnap);
+        fclose(fsnap);
+
+        json record;
+        record["name"] = name;
+        record["algorithm"] = algorithm;
+        record["start time"] = start_time;
+        record["duration"] = duration;
+        record["simulation time"] = cur_time;
+        record["real-world time"] = rw_time;
+        record["estimated time of arrival"] = eta;
+        record["compute time"] = compute_time_result.getResult();
+        record["update entry"] = update_entry_result.getResult();
+        record["number of observers"] = num_observers;
+        record["snapshot"] = seq;
+        record["finished"] = finished;
+        auto jsonl_path = report_dir + "/" + progress_filename + ".jsonl";
+        auto fprog = fopen(jsonl_path.c_str(), "a");
+        fprintf(fprog, "%s\n", record.dump().c_str());
+        fclose(fprog);
     }
 
 public:
@@ -371,6 +427,7 @@ public:
         auto my_tm = localtime(&utc_tm);
         sprintf(report_filename, "report [%s] %s.txt",
             name.c_str(), algorithm.c_str());
+        progress_filename = "report [" + name + "] " + algorithm + ".progress";
         /*
         sprintf(report_filename, "report [%s] %s %d-%02d-%02d %02d:%02d:%02d.txt",
             name.c_str(), algorithm.c_str(), my_tm->tm_year + 1900, my_tm->tm_mon + 1, my_tm->tm_mday,
@@ -382,6 +439,7 @@ public:
     void run() {
         cur_time = start_time;
         run_start = clock();
+        reset_progress();
         
 
         for(; cur_time < start_time + duration; cur_time += step) {
@@ -451,7 +509,7 @@ public:
                 }
             }
         }
-        report();
+        report(true);
 
     }
 
@@ -0,0 +1,58 @@
+import numpy as np
+
+def groupByLength(records, key):
+    groups = {}
+    for idx, record in enumerate(records):
+        groups.setdefault(len(record[key]), []).append(idx)
+    for idxs in groups.values():
+        yield idxs, np.stack([records[idx][key] for idx in idxs])
+
+def means(matrix):
+    return matrix.mean(axis=1)
+
+def percentiles(matrix, qs):
+    n = matrix.shape[1]
+    kth = [min(int(n * q), n - 1) for q in qs]
+    part = np.partition(matrix, sorted(set(kth)), axis=1)
+    return part[:, kth]
+
+def cdf(matrix, lower, upper, numbins):
+    num_records, n = matrix.shape
+    binsize = (upper - lower) / numbins
+    # Values at or just below upper can round to numbins, which would land in
+    # the next row's first bin
+    bins = np.clip(np.floor((matrix - lower) / binsize).astype(np.int64), 0, numbins - 1)
+    valid = (matrix >= lower) & (matrix <= upper)
+    rows = np.broadcast_to(np.arange(num_records)[:, None], matrix.shape)
+    counts = np.bincount((rows * numbins + bins)[valid], minlength=num_records * numbins)
+    freq = counts.reshape(num_records, numbins) / n
+    x = lower + np.linspace(0, binsize * numbins, numbins)
+    return x, np.cumsum(freq, axis=1)
+
+def relativeDelta(values, base):
+    return (values - base) / base
+
+def bootstrapCI(matrix, q=None, num_samples=200, confidence=0.95, seed=0):
+    rng = np.random.default_rng(seed)
+    num_records, n = matrix.shape
+    samples = np.empty((num_samples, num_records))
+    for i in range(num_samples):
+        if q is None:
+            weights = np.bincount(rng.integers(0, n, n), minlength=n)
+            samples[i] = matrix @ weights / n
+        else:
+            samples[i] = percentiles(matrix[:, rng.integers(0, n, n)], [q])[:, 0]
+    alpha = (1 - confidence) / 2
+    return np.quantile(samples, alpha, axis=0), np.quantile(samples, 1 - alpha, axis=0)
+
+def summarize(records, qs=(0.50, 0.90, 0.99)):
+    num_records = len(records)
+    avg_lat = np.zeros(num_records)
+    avg_fr = np.zeros(num_records)
+    pct_lat = np.zeros((num_records, len(qs)))
+    for idxs, matrix in groupByLength(records, "latency"):
+        avg_lat[idxs] = means(matrix)
+        pct_lat[idxs] = percentiles(matrix, qs)
+    for idxs, matrix in groupByLength(records, "failure"):
+        avg_fr[idxs] = means(matrix)
+    return avg_fr, avg_lat, pct_lat
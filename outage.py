@@ -0,0 +1,125 @@
+import os
+import sys
+import time
+import numpy as np
+
+# isl-sun-outage as an event timeline: every link going down or coming back
+# up, in time order, plus a full snapshot of the down links every
+# snapshot_interval steps. Links are stored as (u, v) with u < v.
+timeline_name = "timeline.npz"
+snapshot_interval = 360
+
+def readLinks(file_path):
+    with open(file_path) as f:
+        pairs = np.array(f.read().split(), dtype=np.int64).reshape(-1, 2)
+    return np.unique(np.minimum(pairs[:, 0], pairs[:, 1]) << 32 | np.maximum(pairs[:, 0], pairs[:, 1]))
+
+def splitKeys(keys):
+    return (keys >> 32).astype(np.int32), (keys & 0xffffffff).astype(np.int32)
+
+def outageTimes(outage_dir):
+    return np.array(sorted(int(file[:-4]) for file in os.listdir(outage_dir) if file.endswith(".txt") and file[:-4].isdigit()), dtype=np.int64)
+
+def convert(outage_dir, output_path=None, interval=snapshot_interval):
+    times = outageTimes(outage_dir)
+    events = {"time": [], "key": [], "down": []}
+    snapshots = {"time": [], "event": [], "offsets": [0], "key": []}
+    num_events = 0
+    prev = np.zeros(0, dtype=np.int64)
+    for idx, cur_time in enumerate(times):
+        cur = readLinks(os.path.join(outage_dir, "{}.txt".format(cur_time)))
+        down, up = np.setdiff1d(cur, prev, assume_unique=True), np.setdiff1d(prev, cur, assume_unique=True)
+        for keys, is_down in [(up, False), (down, True)]:
+            events["time"].append(np.full(len(keys), cur_time, dtype=np.int64))
+            events["key"].append(keys)
+            events["down"].append(np.full(len(keys), is_down))
+            num_events += len(keys)
+        if idx % interval == 0:
+            # Events at the snapshot's own time are already part of it
+            snapshots["time"].append(cur_time)
+            snapshots["event"].append(num_events)
+            snapshots["key"].append(cur)
+            snapshots["offsets"].append(snapshots["offsets"][-1] + len(cur))
+        prev = cur
+
+    event_key = np.concatenate(events["key"]) if times.size else np.zeros(0, dtype=np.int64)
+    snap_key = np.concatenate(snapshots["key"]) if times.size else np.zeros(0, dtype=np.int64)
+    event_u, event_v = splitKeys(event_key)
+    snap_u, snap_v = splitKeys(snap_key)
+    output_path = output_path or os.path.join(outage_dir, timeline_name)
+    np.savez_compressed(output_path,
+        times=times,
+        event_time=np.concatenate(events["time"]) if times.size else np.zeros(0, dtype=np.int64),
+        event_u=event_u, event_v=event_v,
+        event_down=np.concatenate(events["down"]) if times.size else np.zeros(0, dtype=bool),
+        snap_time=np.array(snapshots["time"], dtype=np.int64),
+        snap_event=np.array(snapshots["event"], dtype=np.int64),
+        snap_offsets=np.array(snapshots["offsets"], dtype=np.int64),
+        snap_u=snap_u, snap_v=snap_v)
+    return output_path
+
+class Timeline:
+    def __init__(self, path):
+        with np.load(path) as data:
+            for name in data.files:
+                setattr(self, name, data[name])
+        self.event_key = self.event_u.astype(np.int64) << 32 | self.event_v
+        self.snap_key = self.snap_u.astype(np.int64) << 32 | self.snap_v
+
+    def stateAt(self, t):
+        # Links that are down at time t, as an array of (u, v) rows
+        snap = np.searchsorted(self.snap_time, t, side="right") - 1
+        if snap < 0:
+            return np.zeros((0, 2), dtype=np.int32)
+        state = set(self.snap_key[self.snap_offsets[snap]: self.snap_offsets[snap + 1]].tolist())
+        end = np.searchsorted(self.event_time, t, side="right")
+        for key, down in zip(self.event_key[self.snap_event[snap]: end].tolist(), self.event_down[self.snap_event[snap]: end].tolist()):
+            if down:
+                state.add(key)
+            else:
+                state.discard(key)
+        keys = np.array(sorted(state), dtype=np.int64)
+        return np.stack(splitKeys(keys), axis=1)
+
+    def changes(self, t1, t2):
+        # Events in (t1, t2] as (time, u, v, down) arrays in time order
+        begin, end = np.searchsorted(self.event_time, [t1, t2], side="right")
+        return self.event_time[begin: end], self.event_u[begin: end], self.event_v[begin: end], self.event_down[begin: end]
+
+timeline_cache = {}
+
+def load(outage_dir):
+    # Timeline of an outage directory, or None if it was not converted
+    path = os.path.join(outage_dir, timeline_name)
+    if path not in timeline_cache:
+        timeline_cache[path] = Timeline(path) if os.path.exists(path) else None
+    return timeline_cache[path]
+
+def directorySize(outage_dir):
+    return sum(os.path.getsize(os.path.join(outage_dir, file)) for file in os.listdir(outage_dir) if file.endswith(".txt"))
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python outage.py <isl-sun-outage dir> [output file] [snapshot interval] [--check]")
+        exit(0)
+
+    check = "--check" in sys.argv
+    if check:
+        sys.argv.remove("--check")
+    outage_dir = sys.argv[1]
+    output_path = sys.argv[2] if len(sys.argv) > 2 else None
+    interval = int(sys.argv[3]) if len(sys.argv) > 3 else snapshot_interval
+
+    begin_time = time.time()
+    output_path = convert(outage_dir, output_path, interval)
+    print("Converted in {:.2f}s".format(time.time() - begin_time))
+    timeline = Timeline(output_path)
+    print("{} steps, {} events, {} snapshots".format(len(timeline.times), len(timeline.event_time), len(timeline.snap_time)))
+    print("Size: {} bytes -> {} bytes".format(directorySize(outage_dir), os.path.getsize(output_path)))
+
+    if check:
+        for cur_time in timeline.times:
+            expected = readLinks(os.path.join(outage_dir, "{}.txt".format(cur_time)))
+            u, v = splitKeys(expected)
+            assert np.array_equal(timeline.stateAt(cur_time), np.stack([u, v], axis=1)), "mismatch at {}".format(cur_time)
+        print("All {} steps match".format(len(timeline.times)))
@@ -0,0 +1,91 @@
+import os
+import sys
+import json
+import time
+import numpy as np
+
+progress_ext = ".progress.jsonl"
+snapshot_ext = ".progress.bin"
+tail_size = 1 << 16
+
+def readProgress(file_path):
+    with open(file_path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - tail_size))
+        data = f.read()
+    for line in reversed(data.split(b"\n")[:-1]):
+        try:
+            return json.loads(line)
+        except ValueError:
+            continue
+    return None
+
+def readSnapshot(file_path, seq):
+    with open(file_path, "rb") as f:
+        header = f.read(16)
+        if len(header) < 16 or header[:4] != b"SNPS":
+            return None
+        _, num_observers, _ = np.frombuffer(header[4:], dtype=np.int32)
+        slot_size = 8 * (3 + 2 * num_observers)
+        f.seek(16 + (seq % 2) * slot_size)
+        slot = f.read(slot_size)
+    if len(slot) < slot_size:
+        return None
+    head_seq, sim_time = np.frombuffer(slot[:16], dtype=np.int64)
+    tail_seq = np.frombuffer(slot[-8:], dtype=np.int64)[0]
+    if head_seq != seq or tail_seq != seq:
+        return None
+    values = np.frombuffer(slot[16:-8], dtype=np.float64)
+    return int(sim_time), values[:num_observers], values[num_observers:]
+
+def readRun(report_dir, file):
+    record = readProgress(os.path.join(report_dir, file))
+    if record is None:
+        return None
+    snapshot_path = os.path.join(report_dir, file.replace(progress_ext, snapshot_ext))
+    snapshot = readSnapshot(snapshot_path, record["snapshot"])
+    if snapshot is not None:
+        _, latency, failure = snapshot
+        record["avg latency"] = float(latency.mean()) if len(latency) else 0.0
+        record["avg failure rate"] = float(failure.mean()) if len(failure) else 0.0
+    past_time = record["simulation time"] - record["start time"]
+    record["progress"] = min(past_time / record["duration"], 1.0) if record["duration"] else 1.0
+    return record
+
+def scanRuns(report_dir):
+    runs = []
+    files = os.listdir(report_dir)
+    files.sort()
+    for file in files:
+        if not file.endswith(progress_ext):
+            continue
+        record = readRun(report_dir, file)
+        if record is not None:
+            runs.append(record)
+    return runs
+
+def printRuns(runs):
+    print("{:<40} {:<24} {:>8} {:>10} {:>10} {:>12} {:>12}".format(
+        "name", "algorithm", "progress", "eta", "compute", "avg_latency", "failure_rate"))
+    for run in runs:
+        print("{:<40} {:<24} {:>8.2%} {:>10.0f} {:>10.4f} {:>12} {:>12}".format(
+            run["name"], run["algorithm"], run["progress"],
+            0 if run["finished"] else run["estimated time of arrival"], run["compute time"],
+            "{:.2f}".format(run["avg latency"]) if "avg latency" in run else "-",
+            "{:.4%}".format(run["avg failure rate"]) if "avg failure rate" in run else "-"))
+    if runs:
+        finished = sum([1 for run in runs if run["finished"]])
+        remaining = max([0] + [run["estimated time of arrival"] for run in runs if not run["finished"]])
+        overall = sum([run["progress"] for run in runs]) / len(runs)
+        print("Runs: {}, finished: {}, overall progress: {:.2%}, ETA: {:.0f}s".format(len(runs), finished, overall, remaining))
+
+if __name__ == "__main__":
+    report_dir = sys.argv[1] if len(sys.argv) > 1 else "output"
+    interval = float(sys.argv[2]) if len(sys.argv) > 2 else 0
+    while True:
+        printRuns(scanRuns(report_dir))
+        if interval <= 0:
+            break
+        time.sleep(interval)
+        print()
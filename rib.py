@@ -0,0 +1,132 @@
+import os
+import sys
+import json
+import time
+import numpy as np
+import isl
+
+# Outcome of a replayed query, in the order of the summary columns
+delivered, black_hole, loop, unknown = range(4)
+outcome_names = ["delivered", "black hole", "loop", "unknown node"]
+batch_size = 16384
+
+def ribDir(config, algorithm, rib_root="rib"):
+    return os.path.join(rib_root, config["name"], algorithm)
+
+def ribNodes(rib_dir):
+    return sorted(int(node) for node in os.listdir(rib_dir) if node.isdigit())
+
+def ribTimes(rib_dir, nodes):
+    times = set()
+    for node in nodes:
+        times.update(int(file[:-4]) for file in os.listdir(os.path.join(rib_dir, str(node))) if file.endswith(".txt"))
+    return np.array(sorted(times), dtype=np.int64)
+
+def loadRib(rib_dir, nodes, dump_time, num_nodes):
+    # One row per dumped node. A node that did not dump at this time gets
+    # -1 entries, which the replay reports as unknown.
+    tables = np.full((len(nodes), num_nodes), -1, dtype=np.int8)
+    for row, node in enumerate(nodes):
+        table = isl.readNumbers(os.path.join(rib_dir, str(node), "{}.txt".format(dump_time)), np.int8)
+        if len(table) == num_nodes:
+            tables[row] = table
+    return tables
+
+def walk(tables, row_of, nbr, banned, delay, src, dst):
+    # Follow the next hops of all queries in lock step, dropping the ones
+    # that arrive or fail from the active set
+    num = len(src)
+    status = np.full(num, delivered, dtype=np.int8)
+    hops = np.zeros(num, dtype=np.int64)
+    latency = np.zeros(num)
+    visited = np.zeros((num, len(row_of)), dtype=bool)
+    cur = src.copy()
+    active = np.flatnonzero(cur != dst)
+    while len(active):
+        node = cur[active]
+        row = row_of[node]
+        port = np.where(row >= 0, tables[row, dst[active]], -1).astype(np.int64)
+        failed = np.full(len(active), -1, dtype=np.int8)
+        failed[visited[active, node]] = loop
+        known = port >= 0
+        failed[(failed == -1) & ~known] = unknown
+        blocked = known & ((port == 0) | banned[node, np.maximum(port, 0)])
+        failed[(failed == -1) & blocked] = black_hole
+        status[active[failed != -1]] = failed[failed != -1]
+
+        active, node, port = active[failed == -1], node[failed == -1], port[failed == -1]
+        visited[active, node] = True
+        latency[active] += delay[node, port]
+        hops[active] += 1
+        cur[active] = nbr[node, port]
+        active = active[cur[active] != dst[active]]
+    return status, hops, latency
+
+def replay(config, algorithm, src, dst, query_time, rib_root="rib"):
+    rib_dir = ribDir(config, algorithm, rib_root)
+    nodes = ribNodes(rib_dir)
+    dump_times = ribTimes(rib_dir, nodes)
+    nbr = isl.neighbours(config)
+    row_of = np.full(len(nbr), -1, dtype=np.int64)
+    row_of[nodes] = np.arange(len(nodes))
+
+    status = np.zeros(len(src), dtype=np.int8)
+    hops = np.zeros(len(src), dtype=np.int64)
+    latency = np.zeros(len(src))
+    # The table in effect at a time is the last one dumped at or before it;
+    # before the first update every entry is 0 and packets are dropped.
+    epoch = np.searchsorted(dump_times, query_time, side="right") - 1
+    order = np.argsort(query_time, kind="stable")
+    bounds = np.flatnonzero(np.diff(query_time[order])) + 1
+    groups = [idx for idx in np.split(order, bounds) if len(idx)]
+    tables, loaded_epoch = None, None
+    for idx, banned in zip(groups, isl.bannedSeries(config, [query_time[idx[0]] for idx in groups], nbr)):
+        cur_epoch, cur_time = epoch[idx[0]], query_time[idx[0]]
+        if cur_epoch != loaded_epoch:
+            if cur_epoch >= 0:
+                tables = loadRib(rib_dir, nodes, dump_times[cur_epoch], len(nbr))
+            else:
+                tables = np.zeros((len(nodes), len(nbr)), dtype=np.int8)
+            loaded_epoch = cur_epoch
+        delay = isl.loadDelay(config, cur_time, nbr)
+        for begin in range(0, len(idx), batch_size):
+            batch = idx[begin: begin + batch_size]
+            status[batch], hops[batch], latency[batch] = walk(tables, row_of, nbr, banned, delay, src[batch], dst[batch])
+    return status, hops, latency
+
+def randomQueries(config, nodes, num_queries, seed=0):
+    # Sources are drawn from the dumped nodes so that at least the first hop
+    # can be looked up
+    rng = np.random.default_rng(seed)
+    num_nodes = len(isl.neighbours(config))
+    src = np.array(nodes, dtype=np.int64)[rng.integers(0, len(nodes), num_queries)]
+    dst = (src + rng.integers(1, num_nodes, num_queries)) % num_nodes
+    query_time = isl.simTimes(config)[rng.integers(0, len(isl.simTimes(config)), num_queries)]
+    return src, dst, query_time
+
+def summarize(status, hops, latency):
+    res = {name: float((status == code).mean()) if len(status) else 0.0 for code, name in enumerate(outcome_names)}
+    ok = status == delivered
+    res["avg latency"] = float(latency[ok].mean()) if ok.any() else 0.0
+    res["p50 latency"], res["p99 latency"] = [float(v) for v in np.percentile(latency[ok], [50, 99])] if ok.any() else [0.0, 0.0]
+    res["avg hops"] = float(hops[ok].mean()) if ok.any() else 0.0
+    return res
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python rib.py <config> <algorithm name> [number of queries] [output file]")
+        exit(0)
+
+    json_f = open(sys.argv[1])
+    config = json.loads(json_f.read())
+    algorithm = sys.argv[2]
+    num_queries = int(sys.argv[3]) if len(sys.argv) > 3 else 1000000
+
+    begin_time = time.time()
+    src, dst, query_time = randomQueries(config, ribNodes(ribDir(config, algorithm)), num_queries, config.get("random_seed", 0))
+    status, hops, latency = replay(config, algorithm, src, dst, query_time)
+    for key, value in summarize(status, hops, latency).items():
+        print("{}: {}".format(key, "{:.4%}".format(value) if key in outcome_names else "{:.4f}".format(value)))
+    print("Replayed {} queries in {:.2f}s".format(num_queries, time.time() - begin_time))
+    if len(sys.argv) > 4:
+        np.savez(sys.argv[4], src=src, dst=dst, time=query_time, status=status, hops=hops, latency=latency)
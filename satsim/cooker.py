@@ -49,7 +49,7 @@ def message_received(client, server: WebsocketServer, message):
 
     print("Sending frame {}...".format(index))
     scenarioExtension = traceGenerator.generateScenario(
-                    [constellation, scenario, index], tgconfig)
+                    [constellation, scenario, index], tgconfig, server.routeCache)
     server.send_message(client, json.dumps({
         "type": "frame",
         "content": {
@@ -58,10 +58,11 @@ def message_received(client, server: WebsocketServer, message):
             "edges": common["edges"] + scenarioExtension["edges"]
         }})
     )
-    print("Done.")
+    print("Done. Route cache hit rate: {:.2%}".format(server.routeCache.stats()["hit rate"]))
 
 if __name__ == "__main__":
     server = WebsocketServer(host='192.168.1.14', port=8283)
     server.cache = {}
+    server.routeCache = traceGenerator.RouteCache()
     server.set_fn_message_received(message_received)
     server.run_forever()
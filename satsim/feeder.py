@@ -1,5 +1,9 @@
 from websocket_server import WebsocketServer
 import json
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "visualization", "backend"))
+import viewport
 
 
 def message_received(client, server: WebsocketServer, message):
@@ -38,15 +42,12 @@ def message_received(client, server: WebsocketServer, message):
         print("Done.")
 
     common = server.cache[constellation][""]
+    view = viewport.requestView(request)
     if scenario == "":
         print("Sending frame {}...".format(frame))
         server.send_message(client, json.dumps({
             "type": "frame",
-            "content": {
-                "index": frame,
-                "nodes": common["nodes"][frame],
-                "edges": common["edges"]
-            }
+            "content": frameContent(frame, [constellation, "", frame], common["nodes"][frame], common["edges"], view)
         }))
         print("Done.")
         return
@@ -62,15 +63,30 @@ def message_received(client, server: WebsocketServer, message):
     scenarioExtension = server.cache[constellation][scenario]
     server.send_message(client, json.dumps({
         "type": "frame",
-        "content": {
-            "index": frame,
-            "nodes": common["nodes"][frame] + scenarioExtension[frame]["nodes"],
-            "edges": common["edges"] + scenarioExtension[frame]["edges"]
-        }})
+        "content": frameContent(frame, [constellation, scenario, frame],
+            common["nodes"][frame] + scenarioExtension[frame]["nodes"],
+            common["edges"] + scenarioExtension[frame]["edges"], view)
+        })
     )
     print("Done.")
 
 
+def frameContent(frame, key, nodes, edges, view):
+    if view is None:
+        return {"index": frame, "nodes": nodes, "edges": edges}
+    # Dashed edges are the constellation grid, solid ones the routes
+    node_ids, edge_ids = viewport.cullFrame(tuple(key),
+        [node["coordinates"][0] for node in nodes], [node["coordinates"][1] for node in nodes],
+        [edge["endpoints"] for edge in edges], [edge["dashline"] for edge in edges], view)
+    endpoints = viewport.remapEdges([edges[i]["endpoints"] for i in edge_ids], node_ids)
+    return {
+        "index": frame,
+        "nodes": [nodes[i] for i in node_ids],
+        "edges": [dict(edges[i], endpoints=[int(u), int(v)]) for (u, v), i in zip(endpoints, edge_ids)],
+        "node_ids": node_ids.tolist()
+    }
+
+
 def cacheConstellations(cache):
     config = json.load(open("config.json"))
     for constellation in config.keys():
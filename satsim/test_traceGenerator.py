@@ -0,0 +1,34 @@
+import traceGenerator
+
+def baselineGenRoute(model, src, dst):
+    # genRoute as it was before the batched version
+    if src < dst:
+        src, dst = dst, src
+    routes = []
+    P, Q, F = model.P, model.Q, model.F
+    left = (src // Q - dst // Q) + abs(src % Q - dst % Q)
+    right = (P + dst // Q - src // Q) + abs((src % Q + F) % Q - dst % Q)
+    cur = src
+    if left < right:
+        while cur // Q > dst // Q:
+            routes.append([cur, cur - Q])
+            cur -= Q
+    else:
+        while cur // Q < P - 1:
+            routes.append([cur, cur + Q])
+            cur += Q
+        routes.append([cur, ((cur % Q) + F) % Q])
+        cur = ((cur % Q) + F) % Q
+        while cur // Q < dst // Q:
+            routes.append([cur, cur + Q])
+            cur += Q
+    for t in range(min(cur, dst), max(cur, dst)):
+        routes.append([t, t + 1])
+    return [{"endpoints": route, "color": "red", "dashline": False} for route in routes]
+
+def test_gen_route_matches_baseline():
+    for constellation in [[550, 53, 7, 6], [550, 53, 4, 9]]:
+        model = traceGenerator.SatelliteModel(constellation)
+        for src in range(model.P * model.Q):
+            for dst in range(model.P * model.Q):
+                assert model.genRoute(src, dst) == baselineGenRoute(model, src, dst), (src, dst)
@@ -2,6 +2,8 @@
 import json
 import math
 import os
+from collections import OrderedDict
+import numpy as np
 
 
 class SatelliteModel:
@@ -53,6 +55,39 @@ class SatelliteModel:
         y = math.asin(math.sin(self.a) * math.sin(u))
         return y
 
+    def normalizeArray(self, x):
+        # Same steps as normalize, so the angles match it bit for bit
+        x = np.array(x, dtype=np.float64)
+        while True:
+            mask = x >= math.pi
+            if not mask.any():
+                break
+            x[mask] -= 2 * math.pi
+        while True:
+            mask = x < -math.pi
+            if not mask.any():
+                break
+            x[mask] += 2 * math.pi
+        return x
+
+    def phaseBatch(self, times):
+        # Argument of latitude of every satellite, one row per time
+        i, j = np.divmod(np.arange(self.size()), self.Q)
+        t = np.asarray(times, dtype=np.float64).reshape(-1, 1)
+        return self.normalizeArray(self.Ws * t + 2 * math.pi / self.Q * j + 2 * math.pi * self.F / self.Q / self.P * i)
+
+    def phiBatch(self, times):
+        return np.arcsin(math.sin(self.a) * np.sin(self.phaseBatch(times)))
+
+    def coordBatch(self, times):
+        u = self.phaseBatch(times)
+        i = np.arange(self.size()) // self.Q
+        descending = (u >= math.pi / 2) | (u < -math.pi / 2)
+        ld = np.arctan(math.cos(self.a) * np.tan(u)) + np.where(descending, math.pi, 0)
+        x = self.normalizeArray(2 * math.pi / self.P * i - self.We * np.asarray(times, dtype=np.float64).reshape(-1, 1) + ld)
+        y = np.arcsin(math.sin(self.a) * np.sin(u))
+        return x, y
+
     def genTopology(self, t):
         topo = {"nodes": [], "edges": []}
         for i in range(self.P):
@@ -96,34 +131,54 @@ class SatelliteModel:
                 satDists.append(math.dist(queryCoord, satCoord))
         return satDists.index(min(satDists))
 
-    def genRoute(self, src, dst):
-        if src < dst:
-            src, dst = dst, src
-
-        routes = []
+    def queryNearestBatch(self, locations, times):
+        # Closest satellite to every location at every time, shape [times, locations]
+        locations = np.asarray(locations, dtype=np.float64).reshape(-1, 3)
+        lon, lat, r = locations[:, 0], locations[:, 1], locations[:, 2] + 6371.393
+        query = np.stack([np.cos(lat) * np.cos(lon) * r, np.cos(lat) * np.sin(lon) * r, np.sin(lat) * r], axis=1)
+        times = np.atleast_1d(times)
+        res = np.empty((len(times), len(query)), dtype=np.int64)
+        # Chunks of times keep the [times, satellites, locations] distances small
+        chunk = max(1, (1 << 22) // max(1, self.size() * len(query)))
+        r = self.altitude + 6371.393
+        for begin in range(0, len(times), chunk):
+            x, y = self.coordBatch(times[begin: begin + chunk])
+            sats = np.stack([np.cos(y) * np.cos(x) * r, np.cos(y) * np.sin(x) * r, np.sin(y) * r], axis=2)
+            dist = np.linalg.norm(sats[:, :, None, :] - query[None, None, :, :], axis=3)
+            res[begin: begin + chunk] = dist.argmin(axis=1)
+        return res
+
+    def genRouteBatch(self, src, dst):
+        # Paths of genRoute for many pairs at once, as satellite ids padded with -1
+        src, dst = np.atleast_1d(src).astype(np.int64), np.atleast_1d(dst).astype(np.int64)
+        src, dst = np.maximum(src, dst), np.minimum(src, dst)
         P, Q, F = self.P, self.Q, self.F
-        left = (src // Q - dst // Q) + abs(src % Q - dst % Q)
-        right = (P + dst // Q - src // Q) + abs((src % Q + F) % Q - dst % Q)
-
-        cur = src
-        if left < right:
-            while cur // Q > dst // Q:
-                routes.append([cur, cur - Q])
-                cur -= Q
-        else:
-            while cur // Q < P - 1:
-                routes.append([cur, cur + Q])
-                cur += Q
-            routes.append([cur, ((cur % Q) + F) % Q])
-            cur = ((cur % Q) + F) % Q
-            while cur // Q < dst // Q:
-                routes.append([cur, cur + Q])
-                cur += Q
-
-        for t in range(min(cur, dst), max(cur, dst)):
-            routes.append([t, t + 1])
-
-        return [{"endpoints": route, "color": "red", "dashline": False} for route in routes]
+        ps, js, pd, jd = src // Q, src % Q, dst // Q, dst % Q
+        left = (ps - pd) + np.abs(js - jd)
+        right = (P + pd - ps) + np.abs((js + F) % Q - jd)
+        go_left = left < right
+        # Going right crosses the seam behind the last plane, which shifts the index by F
+        Hh = np.where(go_left, ps - pd, P + pd - ps)
+        jh = np.where(go_left, js, (js + F) % Q)
+        Hv = np.abs(jh - jd)
+        lengths = Hh + Hv + 1
+        pos = np.arange(lengths.max(initial=1))[None, :]
+        h = np.minimum(pos, Hh[:, None])
+        plane = np.where(go_left[:, None], ps[:, None] - h, (ps[:, None] + h) % P)
+        index = np.where(go_left[:, None] | (ps[:, None] + h < P), js[:, None], jh[:, None])
+        index = index + np.sign(jd - jh)[:, None] * (pos - h)
+        paths = np.where(pos < lengths[:, None], plane * Q + index, -1)
+        return paths, lengths
+
+    def genRoute(self, src, dst):
+        # The horizontal hops are rendered along the path, the vertical ones
+        # in the destination plane in ascending order as [t, t + 1]
+        paths, lengths = self.genRouteBatch(src, dst)
+        path = paths[0, :lengths[0]]
+        hops = np.flatnonzero(path[1:] // self.Q != path[:-1] // self.Q)
+        k = int(hops[-1]) + 1 if len(hops) else 0
+        vertical = range(int(path[k:].min()), int(path[k:].max()))
+        return self.renderPath(path[:k + 1])[:k] + [{"endpoints": [t, t + 1], "color": "red", "dashline": False} for t in vertical]
 
     def moveHorizontally(self, cur, hd):
         assert(hd in [0, -1, 1])
@@ -139,95 +194,112 @@ class SatelliteModel:
         P, Q, F = self.P, self.Q, self.F
         return (cur // Q) * Q + (cur % Q + vd) % Q
 
-    def minHopCount(self, src, dst, s):
+    def minHopCountBatch(self, src, dst):
+        # Closed form of the search in minHopCount: hops and directions of the
+        # shortest horizontal-then-vertical route, the first of the four
+        # direction pairs on ties
+        P, Q, F = self.P, self.Q, self.F
+        ps, js, pd, jd = src // Q, src % Q, dst // Q, dst % Q
+        best = None
+        for hd in [-1, 1]:
+            Hh = (hd * (pd - ps)) % P
+            # Moving across the seam between the last and the first plane shifts the index by F
+            crossed = (pd < ps) if hd == 1 else (pd > ps)
+            jh = (js + hd * F * crossed) % Q
+            for vd in [-1, 1]:
+                Hv = (vd * (jd - jh)) % Q
+                cur = (Hh, Hv, np.full(len(src), hd), np.full(len(src), vd))
+                if best is None:
+                    best = cur
+                else:
+                    better = cur[0] + cur[1] < best[0] + best[1]
+                    best = tuple(np.where(better, c, b) for c, b in zip(cur, best))
+        return best
+
+    def gridNode(self, src, hd, vd, h, k):
+        # s[h][k] of minHopCount: h moves in direction hd, then k moves in direction vd
         P, Q, F = self.P, self.Q, self.F
-        best_direction = None
-        min_hop_count = -1
-        
-        for hor_direction in [-1, 1]:
-            for ver_direction in [-1, 1]:
-                cur = src
-                hor_hop_count = 0
-                ver_hop_count = 0
-                while cur // Q != dst // Q:
-                    cur = self.moveHorizontally(cur, hor_direction)
-                    hor_hop_count += 1
-                while cur % Q != dst % Q:
-                    cur = self.moveVertically(cur, ver_direction)
-                    ver_hop_count += 1
-                assert(cur == dst)
-                hop_count = hor_hop_count + ver_hop_count
-                if best_direction == None or hop_count < min_hop_count:
-                    best_direction = [hor_direction, ver_direction]
-                    min_hop_count = hop_count
-                    Hh = hor_hop_count
-                    Hv = ver_hop_count
-        
-        hd, vd = best_direction[0], best_direction[1]
-        hcur = src
-
-        for _ in range(Hh + 1):
-            vcur = hcur
-            vlist = []
-            for _ in range(Hv + 1):
-                vlist.append(vcur)
-                vcur = self.moveVertically(vcur, vd)
-            s.append(vlist)
-            hcur = self.moveHorizontally(hcur, hd)
+        ps, js = src // Q, src % Q
+        plane = ps + hd * h
+        shift = np.where(plane >= P, F, 0) - np.where(plane < 0, F, 0)
+        return (plane % P) * Q + (js + shift + vd * k) % Q
 
+    def minHopCount(self, src, dst, s):
+        Hh, Hv, hd, vd = [int(v[0]) for v in self.minHopCountBatch(np.array([src]), np.array([dst]))]
+        for h in range(Hh + 1):
+            s.append([int(self.gridNode(src, hd, vd, h, k)) for k in range(Hv + 1)])
         return Hh, Hv
 
+    def routeLayout(self, src, dst, same):
+        # Min-hop grid of each route and whether it first steps over columns
+        # (both ends move the same way) or over rows (opposite directions).
+        # Only the crossing depends on the time.
+        Hh, Hv, hd, vd = self.minHopCountBatch(src, dst)
+        return Hh, Hv, hd, vd, np.asarray(same, dtype=bool)
+
+    def routeCrossing(self, frame, phi, src, layout):
+        # Column or row at which each route crosses its grid: the reward merge
+        # of disCoRoute, run for all queries in lock step. frame indexes the
+        # rows of phi.
+        Hh, Hv, hd, vd, same = layout
+        steps = np.where(same, Hh, Hv)
+        zero = np.zeros_like(steps)
+
+        def node(m, at_end):
+            h = np.where(same, m, np.where(at_end, Hh, zero))
+            k = np.where(same, np.where(at_end, Hv, zero), m)
+            return self.gridNode(src, hd, vd, h, k)
+
+        i, j = zero.copy(), steps.copy()
+        for step in range(int(steps.max(initial=0))):
+            active = step < steps
+            reward_s = np.fabs(phi[frame, node(i, False)] + phi[frame, node(i + 1, False)])
+            reward_t = np.fabs(phi[frame, node(j, True)] + phi[frame, node(j - 1, True)])
+            advance_s = np.where(same, reward_s >= reward_t, reward_s < reward_t)
+            i = np.where(active & advance_s, i + 1, i)
+            j = np.where(active & ~advance_s, j - 1, j)
+        return i
+
+    def routePaths(self, src, layout, cross):
+        # The route runs along one edge of its grid up to the crossing, over
+        # the crossing and along the opposite edge, padded with -1
+        Hh, Hv, hd, vd, same = layout
+        lengths = Hh + Hv + 1
+        pos = np.arange(lengths.max(initial=1))[None, :]
+        cross, along, other = cross[:, None], np.where(same, Hh, Hv)[:, None], np.where(same, Hv, Hh)[:, None]
+        # Position on the first edge, on the crossing and on the last edge
+        first = np.where(pos <= cross, pos, np.where(pos < cross + other, cross, pos - other))
+        second = np.where(pos <= cross, 0, np.where(pos < cross + other, pos - cross, other))
+        first = np.minimum(first, along)
+        h = np.where(same[:, None], first, second)
+        k = np.where(same[:, None], second, first)
+        paths = self.gridNode(src[:, None], hd[:, None], vd[:, None], h, k)
+        paths = np.where(pos < lengths[:, None], paths, -1)
+        return paths, lengths
+
+    def descendingBatch(self, times):
+        u = self.phaseBatch(times)
+        return (u >= math.pi / 2) | (u < -math.pi / 2)
+
+    def disCoRouteBatch(self, t, src, dst, phi=None):
+        # DisCoRoute for many (time, src, dst) queries at once. phi is phiBatch
+        # of the unique times when the caller already has it.
+        t = np.atleast_1d(t)
+        src, dst = np.atleast_1d(src).astype(np.int64), np.atleast_1d(dst).astype(np.int64)
+        times, frame = np.unique(t, return_inverse=True)
+        if phi is None:
+            phi = self.phiBatch(times)
+        descending = self.descendingBatch(times)
+        layout = self.routeLayout(src, dst, descending[frame, src] == descending[frame, dst])
+        return self.routePaths(src, layout, self.routeCrossing(frame, phi, src, layout))
+
     def disCoRoute(self, t, src, dst):
-        s = []
-        Hh, Hv = self.minHopCount(src, dst, s)
-
-        if self.satDescending(t, src) == self.satDescending(t, dst):
-            route_s = [src]
-            route_t = [dst]
-            i = 0
-            j = Hh
-            for _ in range(Hh):
-                reward_s = math.fabs(self.getPhi(t, s[i][0]) + self.getPhi(t, s[i + 1][0]))
-                reward_t = math.fabs(self.getPhi(t, s[j][Hv]) + self.getPhi(t, s[j - 1][Hv]))
-                if reward_s < reward_t:
-                    route_t.insert(0, s[j - 1][Hv])
-                    j = j - 1
-                else:
-                    route_s.append(s[i + 1][0])
-                    i = i + 1
-            assert(i == j)
-            if Hv == 0:
-                route_t = route_t[1:]
-            else:
-                route_s = route_s + [s[i][k] for k in range(1, Hv)]
-            route = route_s + route_t
-        else:
-            route_s = [src]
-            route_t = [dst]
-            i = 0
-            j = Hv
-            for _ in range(Hv):
-                reward_s = math.fabs(self.getPhi(t, s[0][i]) + self.getPhi(t, s[0][i + 1]))
-                reward_t = math.fabs(self.getPhi(t, s[Hh][j]) + self.getPhi(t, s[Hh][j - 1]))
-                if reward_s < reward_t:
-                    route_s.append(s[0][i + 1])
-                    i = i + 1
-                else:
-                    route_t.insert(0, s[Hh][j - 1])
-                    j = j - 1
-            assert(i == j)
-            if Hh == 0:
-                route_t = route_t[1:]
-            else:
-                route_s = route_s + [s[k][i] for k in range(1, Hh)]
-            route = route_s + route_t
-
-        render_info = []
-        for i in range(len(route) - 1):
-            render_info.append(
-                {"endpoints": [route[i], route[i + 1]], "color": "red", "dashline": False}
-            )
-        return render_info
+        paths, lengths = self.disCoRouteBatch(t, src, dst)
+        return self.renderPath(paths[0, :lengths[0]])
+
+    def renderPath(self, path):
+        return [{"endpoints": [int(path[i]), int(path[i + 1])], "color": "red", "dashline": False}
+                for i in range(len(path) - 1)]
 
 def convertConfig(config):
     res = {}
@@ -238,37 +310,96 @@ def convertConfig(config):
     return res
 
 
-def generateScenario(request, config):
-    constellation, scenario, frame = request
-    satModel = SatelliteModel(config["constellations"][constellation])
-    elapsedSeconds = frame
-    scenarioExtension = {"nodes": [], "edges": []}
+def scenarioFlows(scenario, config):
+    # (source, destination) user locations of every flow in a scenario
+    flows = []
     for cityInfo in scenario.split('&'):
-        print(cityInfo)
-        userCities = cityInfo.split('-')
-        userAcessPoints = []
-        for _, userCity in enumerate(userCities):
-            userCity = userCity.strip()
-            userLocation = [math.radians(config["cities"][userCity][i])
-                            for i in range(2)] + [0]
-            userAP = satModel.queryNearest(
-                userLocation, elapsedSeconds)
-            userAcessPoints.append(userAP)
-            '''
-            scenarioExtension["nodes"].append({
-                "name": "User_" + str(userIdx + 1),
-                "coordinates": config["cities"][userCity] + [0],
-                "color": "red"
-            })
-            scenarioExtension["edges"].append({
-                "endpoints": [userIdx + satModel.size(), userAP],
-                "color": "red",
-                "dashline": False
-            })
-            '''
-        scenarioExtension["edges"] += satModel.disCoRoute(elapsedSeconds,
-            userAcessPoints[0], userAcessPoints[1])
-    return scenarioExtension
+        userCities = [userCity.strip() for userCity in cityInfo.split('-')]
+        flows.append([[math.radians(config["cities"][userCity][i]) for i in range(2)] + [0]
+                      for userCity in userCities[:2]])
+    return flows
+
+
+class RouteCache:
+    # Routes of a scenario frame, reused when the same frame is asked for
+    # again (the online server revisits frames as clients scrub). Access
+    # satellites and crossings both move with time, so the whole frame is the
+    # key: a hit skips the nearest-satellite lookup and the route search.
+    def __init__(self, maxSize=1 << 12):
+        self.maxSize = maxSize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, paths):
+        self.entries[key] = paths
+        while len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries),
+                "hit rate": self.hits / total if total else 0.0}
+
+
+def scenarioRoutes(constellation, scenario, frames, config, cache=None):
+    # Routes of every flow in every frame as padded satellite paths, shape
+    # [frames, flows, max length], and their lengths
+    frames = np.asarray(frames)
+    if cache is None:
+        satModel = SatelliteModel(config["constellations"][constellation])
+        flows = scenarioFlows(scenario, config)
+        userAcessPoints = satModel.queryNearestBatch([location for flow in flows for location in flow], frames)
+        userAcessPoints = userAcessPoints.reshape(len(frames), len(flows), 2)
+        paths, lengths = satModel.disCoRouteBatch(np.repeat(frames, len(flows)),
+            userAcessPoints[:, :, 0].ravel(), userAcessPoints[:, :, 1].ravel())
+        return paths.reshape(len(frames), len(flows), -1), lengths.reshape(len(frames), len(flows))
+
+    # Each distinct frame is looked up once, so repeats within a call are
+    # neither hits nor misses; the missing frames are routed together
+    routes = {}
+    for frame in dict.fromkeys(frames.tolist()):
+        routes[frame] = cache.get((constellation, scenario, frame))
+    missing = [frame for frame, route in routes.items() if route is None]
+    if missing:
+        paths, lengths = scenarioRoutes(constellation, scenario, missing, config)
+        for frame, framePaths, frameLengths in zip(missing, paths, lengths):
+            routes[frame] = [path[:length] for path, length in zip(framePaths, frameLengths)]
+            cache.put((constellation, scenario, frame), routes[frame])
+
+    flowNum = len(scenarioFlows(scenario, config))
+    lengths = np.array([[len(path) for path in routes[frame]] for frame in frames.tolist()], dtype=np.int64).reshape(len(frames), flowNum)
+    paths = np.full(lengths.shape + (lengths.max(initial=1),), -1, dtype=np.int64)
+    for idx, frame in enumerate(frames.tolist()):
+        for flow, path in enumerate(routes[frame]):
+            paths[idx, flow, :len(path)] = path
+    return paths, lengths
+
+
+def generateScenarioFrames(constellation, scenario, frames, config, cache=None):
+    paths, lengths = scenarioRoutes(constellation, scenario, frames, config, cache)
+    satModel = SatelliteModel(config["constellations"][constellation])
+    res = []
+    for frame in range(len(paths)):
+        scenarioExtension = {"nodes": [], "edges": []}
+        for flow in range(paths.shape[1]):
+            scenarioExtension["edges"] += satModel.renderPath(paths[frame, flow, :lengths[frame, flow]])
+        res.append(scenarioExtension)
+    return res
+
+
+def generateScenario(request, config, cache=None):
+    constellation, scenario, frame = request
+    return generateScenarioFrames(constellation, scenario, [frame], config, cache)[0]
 
 
 def generateTopo(request, config):
@@ -305,10 +436,7 @@ if __name__ == "__main__":
             "nodes": commonNodes,
             "edges": commonEdges
         }, open("{}/common.json".format(path), "w"))
-        for scenario, numframes in scenarios.items():
+        for scenario in scenarios["scenarios"]:
             print("Generating scenario {}".format(scenario))
-            frames = []
-            for t in range(numframes):
-                frames.append(generateScenario(
-                    [constellation, scenario, t], tgconfig))
+            frames = generateScenarioFrames(constellation, scenario, range(scenarios["numframes"]), tgconfig)
             json.dump(frames, open("{}/{}.json".format(path, scenario), "w"))
@@ -1,12 +1,4 @@
-./main configs/slicing-autumn-10.json 3003 &
-sleep 1
-./main configs/slicing-autumn-20.json 3003 &
-sleep 1
-./main configs/slicing-autumn-30.json 3003 &
-sleep 1
-./main configs/slicing-autumn-40.json 3003 &
-sleep 1
-./main configs/slicing-autumn-50.json 3003 &
-sleep 1
-./main configs/slicing-autumn-60.json 3003 &
-sleep 1
+#!/bin/bash
+
+make main
+python sweep.py slicing
@@ -1,150 +1,85 @@
-import os
-import re
-from scipy import stats
+import sys
 import numpy as np
+import algorithms
+import ingest
+import metrics
 
-def getRecords(dir, target_name):
-    records = []
-    files = os.listdir(dir)
-    files.sort()
-    for file in files:
-        if file.find("report") == -1:
-            continue
-        file_path = os.path.join(dir, file)
-        with open(file_path) as f:
-            fdict = {}
-            while True:
-                line = f.readline()
-                key, value = line.split(":")
-                key = key.strip()
-                value = value.strip()
-                fdict[key] = value
-                if key ==  "number of observers":
-                    break
-            '''
-            if "NgDomainBridge" not in fdict["algorithm"] and "DijkstraPred" not in fdict["algorithm"]:
-                continue
-            '''
-            
-            if fdict["name"] == target_name:
-                records.append(fdict)
-            else:
-                continue
-    
-            print(file_path)
+def getRecords(dir, target_name, db_dir=ingest.default_db_dir):
+    ingest.ingestReports(dir, db_dir)
+    return ingest.loadRecords(db_dir, target_name)
 
-            num_observers = int(fdict["number of observers"])
-            route_paths = []
-            for _ in range(num_observers):
-                path_name = f.readline()
-                latency = f.readline().split(":")[1]
-                failure = f.readline().split(":")[1]
-                route_paths.append([path_name, latency, failure])            
-            fdict["path info"] = route_paths
-  
-    return records
+
+def extractRecords(records):
+    avg_fr, avg_lat, pct_lat = metrics.summarize(records, (0.50, 0.90, 0.99))
+    res = []
+    for i, record in enumerate(records):
+        algorithm_name = record["algorithm"]
+        compute_time = float(record["compute time"])
+        update_entry = float(record["update entry"])
+        pct_50, pct_90, pct_99 = pct_lat[i]
+        res.append((algorithm_name, compute_time, update_entry, avg_fr[i], avg_lat[i], pct_50, pct_90, pct_99))
+    return res
 
 
 def extractRecord(record):
-    algorithm_name = record["algorithm"]
-    compute_time = float(record["compute time"])
-    update_entry = float(record["update entry"])
-    paths = record["path info"]
-    num_observers = int(record["number of observers"])
-    avg_fr = 0.0
-    avg_lat = 0.0
-    pct_lat = []
-    for i in range(num_observers):
-        lat = float(paths[i][1])
-        fr = float(paths[i][2])
-        avg_lat += lat
-        avg_fr += fr
-        pct_lat.append(lat)
-    avg_fr /= num_observers
-    avg_lat /= num_observers
-    pct_lat.sort()
-    pct_50 = pct_lat[int(num_observers * 0.50)]
-    pct_90 = pct_lat[int(num_observers * 0.90)]
-    pct_99 = pct_lat[int(num_observers * 0.99)]
-    return algorithm_name, compute_time, update_entry, avg_fr, avg_lat, pct_50, pct_90, pct_99
+    return extractRecords([record])[0]
 
 
 def getAlgoritmIdDict(file_path):
-    res = {}
-    with open(file_path) as f:
-        lines = f.readlines()
-        for line in lines:
-            if line.find("#define") != -1:
-                continue
-            searchObj = re.search(r'CASE\((.*), (.*)\)', line)
-            if searchObj:
-                id = searchObj.group(1)
-                name = searchObj.group(2)
-                name = name.replace("Node", "")
-                name = name.replace("COMMA", "_")
-                name = name.replace("<", "_")
-                name = name.replace(">", "")
-                name = name.replace(" ", "")
-                name = name.replace("Base", "")
-                name = name.lower()
-                res[name] = int(id)
-    res["oracle"] = 0
-    return res
+    return {entry["key"]: entry["id"] for entry in algorithms.loadRegistry(file_path)}
 
 if __name__ == "__main__":
-    algorithmIdDict = getAlgoritmIdDict("main.cpp")
+    report_dir = sys.argv[1] if len(sys.argv) > 1 else "output"
+    db_dir = sys.argv[2] if len(sys.argv) > 2 else ingest.default_db_dir
     target_list = []
 #    target_list += ["GW-A59-3 - Transit"]
     target_list += ["GW-A59-3 (24 hour) - Jan", "GW-A59-3 (24 hour) - Apr", "GW-A59-3 (24 hour) - Jul", "GW-A59-3 (24 hour) - Oct"]
 #    target_list += ["GW-A59-2 (24 hour) - Jan", "GW-A59-2 (24 hour) - Apr", "GW-A59-2 (24 hour) - Jul", "GW-A59-2 (24 hour) - Oct"]
 #    target_list += ["GW-2-1 (24 hour) - Jan", "GW-2-1 (24 hour) - Apr", "GW-2-1 (24 hour) - Jul", "GW-2-1 (24 hour) - Oct"]
 
-    algo_mapping = {
-        "DiffDomainBridge_10_3" : "DomainBridge",
-        "DiffDomainBridge_10_1" : "DomainBridge_1",
-        "LocalDomainBridge_10_3" : "LocalDM",
-        "LocalDomainBridge_10_1" : "LocalDM_1",
-        "DiffDomainBridge_8_3" : "DomainBridge",
-        "DisCoRouteBase" : "DisCoRoute",
-        "DijkstraPred" : "DT-DVTR",
-        "MinHopCount" : "FSA-LA",
-        "LBP" : "LBP"
-    }
-    
+    export_cdf = False
+    export_ci = False
 
     for target_name in target_list:
-        records = getRecords("output", target_name)
-        records.sort(key=lambda record : algorithmIdDict[record["algorithm"].replace("Base", "").lower()])
-        base_upd, base_lat, base_50, base_90, base_99 = 1, 1, 1, 1, 1
+        records = getRecords(report_dir, target_name, db_dir)
+        records.sort(key=lambda record : algorithms.lookup(record["algorithm"])["id"])
+        rows = extractRecords(records)
+        values = np.array([row[2:] for row in rows])
+
+        base = np.ones(values.shape[1])
+        for row, value in zip(rows, values):
+            if row[0] == "DijkstraPred":
+                base = value
+        rel = metrics.relativeDelta(values, base)
 
         with open("summary [{}].csv".format(target_name), 'w') as f:
             f.write("name, compute_time, update_entry, avg_failure_rate, avg_latency, pct_50, pct_90, pct_99\n")
     #        f.write("algorithm name, failure rate\n")
 
-            for record in records:
-                if record["algorithm"] == "DijkstraPred":
-                    _, _, base_upd, _, base_lat, base_50, base_90, base_99 = extractRecord(record)
-
-            for record in records:
-                algorithm_name, compute_time, update_entry, avg_fr, avg_lat, pct_50, pct_90, pct_99 = extractRecord(record)
-                rel_upd = (update_entry - base_upd) / base_upd
-                rel_lat = (avg_lat - base_lat) / base_lat
-                rel_50 = (pct_50 - base_50) / base_50
-                rel_90 = (pct_90 - base_90) / base_90
-                rel_99 = (pct_99 - base_99) / base_99
+            for row, rel_row in zip(rows, rel):
+                algorithm_name, compute_time, update_entry, avg_fr, avg_lat, pct_50, pct_90, pct_99 = row
+                rel_upd, _, rel_lat, rel_50, rel_90, rel_99 = rel_row
                 upd_grid = "{:.2f}".format(update_entry) + ("({:+.2%})".format(rel_upd) if rel_upd < 2 and algorithm_name != "Oracle" else "")
-                algorithm_name = algo_mapping[algorithm_name]
+                algorithm_name = algorithms.alias(algorithm_name)
                 line = "{}, {:.2f}, {}, {:.4%}, {:.2f}({:+.2%}) , {:.2f}({:+.2%}), {:.2f}({:+.2%}), {:.2f}({:+.2%})\n".format(algorithm_name, compute_time, upd_grid, avg_fr, avg_lat, rel_lat, pct_50, rel_50, pct_90, rel_90, pct_99, rel_99)
     #            line = "{}, {:.10f}\n".format(algorithm_name, avg_fr)
                 f.write(line)
-                continue
-                lat_data = np.array([float(path[1]) for path in record["path info"]])
-                lat_freq = stats.relfreq(lat_data, defaultreallimits=(0, 300), numbins=1000)
-                plot_x = lat_freq.lowerlimit + np.linspace(0, lat_freq.binsize * lat_freq.frequency.size,  lat_freq.frequency.size)
-                plot_y = np.cumsum(lat_freq.frequency)
-                
-                pf = open("plot_data/{}.csv".format(algorithm_name), "w")
-                pf.write("latency, fraction\n")
-                for x, y in zip(plot_x, plot_y):
-                    pf.write("{:.6f}, {:.6f}\n".format(x, y))
-                pf.close()
\ No newline at end of file
+
+        if export_ci:
+            with open("summary [{}] ci.csv".format(target_name), 'w') as f:
+                f.write("name, avg_latency_low, avg_latency_high, pct_99_low, pct_99_high\n")
+                for idxs, matrix in metrics.groupByLength(records, "latency"):
+                    avg_low, avg_high = metrics.bootstrapCI(matrix)
+                    pct_low, pct_high = metrics.bootstrapCI(matrix, 0.99)
+                    for i, idx in enumerate(idxs):
+                        f.write("{}, {:.2f}, {:.2f}, {:.2f}, {:.2f}\n".format(algorithms.alias(rows[idx][0]), avg_low[i], avg_high[i], pct_low[i], pct_high[i]))
+
+        if export_cdf:
+            for idxs, matrix in metrics.groupByLength(records, "latency"):
+                plot_x, plot_y = metrics.cdf(matrix, 0, 300, 1000)
+                for i, idx in enumerate(idxs):
+                    pf = open("plot_data/{}.csv".format(algorithms.alias(rows[idx][0])), "w")
+                    pf.write("latency, fraction\n")
+                    for x, y in zip(plot_x, plot_y[i]):
+                        pf.write("{:.6f}, {:.6f}\n".format(x, y))
+                    pf.close()
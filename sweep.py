@@ -0,0 +1,198 @@
+import os
+import sys
+import json
+import copy
+import time
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import algorithms
+
+main_prog = "./main"
+config_dir = "configs/generated"
+log_dir = "logs"
+mem_per_job = 4 << 30
+
+seasons = ["Jan", "Apr", "Jul", "Oct"]
+season_algorithms = [1001, 3003, 5001, 5002, 9433]
+slicing_periods = [10, 20, 30, 40, 50, 60]
+slicing_algorithms = [3003]
+
+def availableMemory():
+    with open("/proc/meminfo") as f:
+        for line in f.readlines():
+            if line.startswith("MemAvailable:"):
+                return int(line.split()[1]) * 1024
+    return None
+
+def workerCount(max_workers=None):
+    workers = os.cpu_count() or 1
+    mem = availableMemory()
+    if mem is not None:
+        workers = min(workers, mem // mem_per_job)
+    if max_workers is not None:
+        workers = min(workers, max_workers)
+    return max(1, workers)
+
+def slugify(text):
+    return "".join([c if c.isalnum() or c in "-_." else "_" for c in text])
+
+def jobSlug(job):
+    config = job["config"]
+    slug = "{} - {}".format(config["name"], job["algorithm"])
+    # Configs of one family may share their name, so the file they came from
+    # tells them apart
+    if "source" in job:
+        slug += " - {}".format(job["source"])
+    if "visualization" in config:
+        slug += " - {}".format(config["visualization"]["scenario"])
+    return slugify(slug)
+
+def reportDone(config, algorithm):
+    report_dir = config["report_dir"]
+    if not os.path.isdir(report_dir):
+        return False
+    prefix = "report [{}] ".format(config["name"])
+    for file in os.listdir(report_dir):
+        if not file.startswith(prefix) or not file.endswith(".txt"):
+            continue
+        name = file[len(prefix):-len(".txt")]
+        entry = algorithms.lookup(name)
+        if entry is None or entry["id"] != algorithm:
+            continue
+        progress_path = os.path.join(report_dir, file[:-len(".txt")] + ".progress.jsonl")
+        if not os.path.exists(progress_path):
+            return True
+        with open(progress_path) as f:
+            lines = f.read().strip().split("\n")
+        return lines[-1].find('"finished":true') != -1
+    return False
+
+def framesDone(config):
+    vis = config["visualization"]
+    frames_path = os.path.join(vis["frames_dir"], vis["scenario"])
+    if not os.path.isdir(frames_path):
+        return False
+    return len(os.listdir(frames_path)) >= config["duration"] // config["step_length"]
+
+def isDone(job):
+    if "visualization" in job["config"]:
+        return framesDone(job["config"])
+    return reportDone(job["config"], job["algorithm"])
+
+def runJob(job):
+    slug = jobSlug(job)
+    config_path = os.path.join(config_dir, slug + ".json")
+    with open(config_path, "w") as f:
+        json.dump(job["config"], f, indent=4)
+    os.makedirs(job["config"]["report_dir"], exist_ok=True)
+
+    print("Starting {}".format(slug))
+    with open(os.path.join(log_dir, slug + ".log"), "w") as log:
+        begin_time = time.time()
+        proc = subprocess.Popen([main_prog, config_path, str(job["algorithm"])], stdout=log, stderr=log)
+        _, status, rusage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        wall_time = time.time() - begin_time
+    print("Finished {} ({:.2f}s, exit {})".format(slug, wall_time, proc.returncode))
+    return {
+        "job": slug,
+        "config": config_path,
+        "algorithm": job["algorithm"],
+        "exit_code": proc.returncode,
+        "wall_time": wall_time,
+        "peak_rss": rusage.ru_maxrss * 1024
+    }
+
+def failedJob(job, error):
+    return {
+        "job": jobSlug(job),
+        "algorithm": job["algorithm"],
+        "exit_code": None,
+        "error": "{}: {}".format(type(error).__name__, error)
+    }
+
+def runJobs(jobs, max_workers=None):
+    os.makedirs(config_dir, exist_ok=True)
+    os.makedirs(log_dir, exist_ok=True)
+    pending = []
+    for job in jobs:
+        if isDone(job):
+            print("Skipping {}".format(jobSlug(job)))
+        else:
+            pending.append(job)
+
+    workers = workerCount(max_workers)
+    print("Running {} jobs ({} skipped) on {} workers".format(len(pending), len(jobs) - len(pending), workers))
+    results = []
+    # Every record is appended as soon as its job ends, so a failing job
+    # neither loses nor holds back the ones that finished
+    with ThreadPoolExecutor(workers) as pool, open(os.path.join(log_dir, "sweep.jsonl"), "a") as f:
+        futures = {pool.submit(runJob, job): job for job in pending}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = failedJob(futures[future], e)
+                print("Failed {} ({})".format(result["job"], result["error"]))
+            results.append(result)
+            f.write(json.dumps(result) + "\n")
+            f.flush()
+    return results
+
+def configJobs(config_paths, algorithm_ids, separate_reports=False):
+    jobs = []
+    for config_path in config_paths:
+        with open(config_path) as f:
+            config = json.load(f)
+        source = os.path.splitext(os.path.basename(config_path))[0]
+        if separate_reports:
+            # Reports and progress files are named after the config name and
+            # the algorithm only, so configs sharing a name need report dirs
+            # of their own
+            config["report_dir"] = os.path.join(config["report_dir"], slugify(source))
+        for algorithm in algorithm_ids:
+            jobs.append({"config": copy.deepcopy(config), "algorithm": algorithm, "source": source})
+    return jobs
+
+def frameJob(config, src, dst, algorithm, frames_dir, scenario):
+    config = copy.deepcopy(config)
+    # Reports and progress files are named after the config name and the
+    # algorithm only, so concurrent scenarios need report dirs of their own
+    config["report_dir"] = os.path.join(config["report_dir"], slugify(scenario))
+    config["visualization"] = {
+        "source": src,
+        "destination": dst,
+        "frames_dir": frames_dir,
+        "scenario": scenario
+    }
+    return {"config": config, "algorithm": algorithm}
+
+def seasonJobs(prefix="full", algorithm_ids=season_algorithms):
+    config_paths = ["configs/seasons/{}-{}.json".format(prefix, season) for season in seasons]
+    return configJobs(config_paths, algorithm_ids)
+
+def slicingJobs(algorithm_ids=slicing_algorithms):
+    config_paths = ["configs/slicing/slicing-autumn-{}.json".format(period) for period in slicing_periods]
+    return configJobs(config_paths, algorithm_ids, separate_reports=True)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Error: please specify a sweep (seasons, slicing)!")
+        exit(0)
+
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    families = sys.argv[3:]
+    algorithm_ids = [entry["id"] for name in families for entry in algorithms.family(name)]
+    if sys.argv[1] == "seasons":
+        jobs = seasonJobs(algorithm_ids=algorithm_ids or season_algorithms)
+    elif sys.argv[1] == "slicing":
+        jobs = slicingJobs(algorithm_ids=algorithm_ids or slicing_algorithms)
+    else:
+        print("Error: invalid sweep name!")
+        exit(0)
+
+    for result in runJobs(jobs, max_workers):
+        if "error" in result:
+            print("{}: failed ({})".format(result["job"], result["error"]))
+        else:
+            print("{}: {:.2f}s, peak RSS {:.1f} MB".format(result["job"], result["wall_time"], result["peak_rss"] / (1 << 20)))
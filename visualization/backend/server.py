@@ -2,6 +2,7 @@ from websocket_server import WebsocketServer
 import json
 import math
 import os
+import viewport
 
 portNum = 11311
 loadDirs = ["/home/chenyuxuan/satnet/visualization/frame_data", "/home/linrunbo/satvis-minimal/visualization/frame_data", "/home/phye/satvis-minimal/visualization/frame_data"]
@@ -57,6 +58,9 @@ def message_received(client, server: WebsocketServer, message):
                     "nodes_3d": node3dList,
                     "num_frames": num_frames
                 }
+                view = viewport.requestView(request)
+                if view is not None:
+                    cullFrame(frame, frame_path, view)
                 break
         
         if not flag:
@@ -65,6 +69,22 @@ def message_received(client, server: WebsocketServer, message):
         msg = json.dumps({ "type" : "frame", "content" : frame})
         server.send_message(client, msg)
 
+def cullFrame(frame, frame_path, view):
+    # Edges of type 1 and 2 are the plain ISLs through port 1 and 2, the rest
+    # are highlighted. Banned ISLs are left out of the plain ones, so their
+    # ids come from the node and port rather than the position in the file.
+    nodes, edges = frame["nodes"], frame["edges"]
+    st = os.stat(frame_path)
+    node_ids, edge_ids = viewport.cullFrame((frame_path, st.st_mtime_ns, st.st_size),
+        [node[0] for node in nodes], [node[1] for node in nodes],
+        [edge[:2] for edge in edges], [edge[2] in [1, 2] for edge in edges], view,
+        [2 * edge[0] + edge[2] - 1 for edge in edges])
+    endpoints = viewport.remapEdges([edges[i][:2] for i in edge_ids], node_ids)
+    frame["nodes"] = [nodes[i] for i in node_ids]
+    frame["edges"] = [[int(u), int(v), edges[i][2]] for (u, v), i in zip(endpoints, edge_ids)]
+    frame["nodes_3d"] = [frame["nodes_3d"][i] for i in node_ids if i < len(frame["nodes_3d"])]
+    frame["node_ids"] = node_ids.tolist()
+
 def load(filename):
     f = open(filename)
     lines = f.readlines()
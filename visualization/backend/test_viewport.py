@@ -0,0 +1,18 @@
+import numpy as np
+import viewport
+
+lon = np.array([-170.0, -20.0, 0.0, 90.0, 179.0, 0.0])
+lat = np.array([0.0, 10.0, -5.0, 30.0, 20.0, 70.0])
+
+def test_full_longitude_keeps_latitude_bounds():
+    bounds, detail = viewport.requestView({"viewport": {"west": -200, "south": -10, "east": 200, "north": 25}})
+    assert bounds == (-180, -10, 180, 25) and detail == viewport.max_detail
+    mask = viewport.GridIndex(lon, lat).query(bounds)
+    assert np.flatnonzero(mask).tolist() == [0, 1, 2, 4]
+
+def test_full_globe_is_whole_frame():
+    assert viewport.requestView({"viewport": {"west": -180, "south": -90, "east": 180, "north": 90}}) is None
+
+def test_antimeridian_box():
+    mask = viewport.GridIndex(lon, lat).query((170, -10, -160, 25))
+    assert np.flatnonzero(mask).tolist() == [0, 4]
@@ -0,0 +1,104 @@
+import numpy as np
+
+# Viewport culling and level of detail for frames. A frame request may carry
+#   "viewport": {"west": .., "south": .., "east": .., "north": ..}
+# in degrees (west > east crosses the antimeridian) and
+#   "detail": 0 .. max_detail
+# Without either the whole frame is sent as before. Otherwise only the nodes
+# inside the box and the edges touching them are sent, and below max_detail
+# the plain ISL edges are thinned out; highlighted edges are always kept.
+cell_size = 10
+max_detail = 3
+index_cache = {}
+index_cache_size = 256
+
+class GridIndex:
+    # Node positions of one frame bucketed into cell_size degree cells
+    def __init__(self, lon, lat, cell=cell_size):
+        self.cell = cell
+        self.cols = int(np.ceil(360 / cell))
+        self.rows = int(np.ceil(180 / cell))
+        self.lon = (np.asarray(lon, dtype=np.float64) + 180) % 360 - 180
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.cell_of = self.cellOf(self.lon, self.lat)
+        self.order = np.argsort(self.cell_of, kind="stable")
+        self.offsets = np.searchsorted(self.cell_of[self.order], np.arange(self.rows * self.cols + 1))
+
+    def column(self, lon):
+        return np.clip(((lon + 180) // self.cell).astype(np.int64), 0, self.cols - 1)
+
+    def row(self, lat):
+        return np.clip(((lat + 90) // self.cell).astype(np.int64), 0, self.rows - 1)
+
+    def cellOf(self, lon, lat):
+        return self.row(lat) * self.cols + self.column(lon)
+
+    def query(self, bounds):
+        # Mask of the nodes inside bounds, looking only at the cells it covers
+        west, south, east, north = bounds
+        full = east - west >= 360
+        west, east = (west + 180) % 360 - 180, (east + 180) % 360 - 180
+        first, last = int(self.column(np.float64(west))), int(self.column(np.float64(east)))
+        if full:
+            west, east, first, last = -180, 180, 0, self.cols - 1
+        cols = list(range(first, last + 1)) if west <= east else list(range(first, self.cols)) + list(range(0, last + 1))
+        rows = range(int(self.row(np.float64(south))), int(self.row(np.float64(north))) + 1)
+        cells = np.array([r * self.cols + c for r in rows for c in cols], dtype=np.int64)
+        candidates = np.concatenate([self.order[self.offsets[c]: self.offsets[c + 1]] for c in cells]) if len(cells) else np.zeros(0, dtype=np.int64)
+        lon, lat = self.lon[candidates], self.lat[candidates]
+        inside = (lat >= south) & (lat <= north) & (((lon >= west) & (lon <= east)) if west <= east else ((lon >= west) | (lon <= east)))
+        mask = np.zeros(len(self.lon), dtype=bool)
+        mask[candidates[inside]] = True
+        return mask
+
+def frameIndex(key, lon, lat):
+    # Grid index of a frame, built on its first request. The key has to
+    # change whenever the node positions do.
+    if key not in index_cache:
+        if len(index_cache) >= index_cache_size:
+            del index_cache[next(iter(index_cache))]
+        index_cache[key] = GridIndex(lon, lat)
+    return index_cache[key]
+
+def requestView(request):
+    # (bounds, detail) of a frame request, or None for the whole frame
+    viewport = request.get("viewport")
+    detail = int(request.get("detail", max_detail))
+    bounds = None
+    if viewport is not None:
+        bounds = (viewport["west"], viewport["south"], viewport["east"], viewport["north"])
+        if viewport["east"] - viewport["west"] >= 360:
+            # All longitudes, but the latitudes may still be cut
+            bounds = (-180, viewport["south"], 180, viewport["north"])
+            if viewport["south"] <= -90 and viewport["north"] >= 90:
+                bounds = None
+    if bounds is None and detail >= max_detail:
+        return None
+    return bounds, max(0, min(detail, max_detail))
+
+def cullFrame(key, lon, lat, edges, plain, view, edge_ids=None):
+    # Ids of the nodes and edges to send. plain marks the edges that may be
+    # dropped at low detail, the rest are always kept when in view. Nodes at
+    # the far end of a kept edge are sent too. edge_ids are stable ids of the
+    # plain edges, 2 * node + (0 or 1) for the two grid ISLs of a node, and
+    # default to the position in edges.
+    bounds, detail = view
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    plain = np.asarray(plain, dtype=bool)
+    index = frameIndex(key, lon, lat)
+    in_view = index.query(bounds) if bounds is not None else np.ones(len(index.lon), dtype=bool)
+    keep = in_view[edges[:, 0]] | in_view[edges[:, 1]]
+    if detail < max_detail:
+        # Every stride-th plain edge by id, so the choice stays the same while
+        # panning and from frame to frame. The second ISL of a node is offset
+        # by half a stride so that both directions are thinned evenly.
+        stride = 2 ** (max_detail - detail)
+        ids = np.arange(len(edges)) if edge_ids is None else np.asarray(edge_ids, dtype=np.int64)
+        rank = ids // 2 + ids % 2 * (stride // 2)
+        keep &= ~plain | (rank % stride == 0)
+    node_ids = np.union1d(np.flatnonzero(in_view), edges[keep].ravel())
+    return node_ids, np.flatnonzero(keep)
+
+def remapEdges(edges, node_ids):
+    # Endpoints as positions in the culled node list
+    return np.searchsorted(node_ids, np.asarray(edges, dtype=np.int64).reshape(-1, 2))